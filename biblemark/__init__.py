@@ -2,6 +2,10 @@ from flask import Flask
 
 from biblemark.config import cache
 from biblemark.config import db
+from biblemark.config import http
+from biblemark.config import marks
+from biblemark.config import store
+from biblemark.config import versions
 from biblemark.utils.helpers import date
 from config import Config
 
@@ -12,6 +16,10 @@ def create_app(config_class=Config):
 
     db.init_app(app)
     cache.init_app(app)
+    http.init_app(app)
+    marks.init_app(app)
+    store.init_app(app)
+    versions.init_app(app)
 
     from biblemark.controller.api import bible_api_controller
     app.register_blueprint(bible_api_controller.bp)
@@ -22,6 +30,12 @@ def create_app(config_class=Config):
     from biblemark.controller.api import user_api_controller
     app.register_blueprint(user_api_controller.bp)
 
+    from biblemark.controller.api import reader_api_controller
+    app.register_blueprint(reader_api_controller.bp)
+
+    from biblemark.controller.api import stats_api_controller
+    app.register_blueprint(stats_api_controller.bp)
+
     from biblemark.controller.web import about_web_controller
     app.register_blueprint(about_web_controller.bp)
 
@@ -40,8 +54,15 @@ def create_app(config_class=Config):
     from biblemark.middleware import authenticated_middleware
     app.register_blueprint(authenticated_middleware.bp)
 
+    from biblemark.middleware import compression_middleware
+    app.register_blueprint(compression_middleware.bp)
+
     app.jinja_env.filters["date"] = date
 
     app.add_url_rule("/", endpoint="index")
 
+    if app.config["CACHE_WARM_ON_START"]:
+        from biblemark.service.warm_service import warm_on_start
+        warm_on_start(app)
+
     return app
@@ -1,25 +1,255 @@
+import logging
+import os
+import random
+import struct
+from time import monotonic, time
+
 import click
 from flask_caching import Cache
+from flask_caching.backends.filesystemcache import FileSystemCache
+
+from biblemark.utils.lru_cache import ByteBoundedLRUCache
+from config import Config
 
 cache = Cache()
+derived_cache = Cache()  # artifacts computed from the upstream data, kept apart so they don't evict it
+
+# lock files live outside CACHE_DIR, since FileSystemCache assumes to be the only user of its directory
+settings = {
+    "CACHE_LOCK_DIR": Config.CACHE_LOCK_DIR,
+    "CACHE_LOCK_TIMEOUT": Config.CACHE_LOCK_TIMEOUT,
+    "CACHE_DEFAULT_TIMEOUT": Config.CACHE_DEFAULT_TIMEOUT,
+    "CACHE_TIMEOUT_JITTER": Config.CACHE_TIMEOUT_JITTER,
+    "CACHE_STALE_WINDOW": Config.CACHE_STALE_WINDOW,
+    "CACHE_NEGATIVE_TIMEOUT": Config.CACHE_NEGATIVE_TIMEOUT,
+}
+
+
+class TieredFileSystemCache(FileSystemCache):
+    """
+    FileSystemCache with an in-process LRU tier (L1) in front of the disk tier (L2).
+
+    L1 is bounded by the serialized byte size of its entries and keeps the same
+    expiration as L2. Values served from L1 are shared between callers, so they
+    must be treated as read-only.
+
+    Clearing the cache bumps a generation file, which other processes check
+    at most once per check interval to drop their own L1 entries.
+    """
+
+    def __init__(self, cache_dir, memory_max_bytes=0, generation_file=None, check_interval=1.0, **kwargs):
+        super().__init__(cache_dir, **kwargs)
+        self.memory = ByteBoundedLRUCache(memory_max_bytes)
+        self.generation_file = generation_file
+        self.check_interval = check_interval
+        self.generation = None
+        self.next_generation_check = 0
+        self.counters = {"l1Hits": 0, "l1Misses": 0, "l2Hits": 0, "l2Misses": 0}
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        args.insert(0, config["CACHE_DIR"])
+        kwargs.update(
+            dict(
+                threshold=config["CACHE_THRESHOLD"],
+                ignore_errors=config["CACHE_IGNORE_ERRORS"],
+                memory_max_bytes=config["CACHE_L1_MAX_BYTES"],
+                generation_file=config["CACHE_GENERATION_FILE"],
+                check_interval=config["CACHE_L1_CHECK_INTERVAL"],
+            )
+        )
+        return cls(*args, **kwargs)
+
+    def get(self, key):
+        if key == self._fs_count_file:
+            return super().get(key)
+
+        self._check_generation()
+
+        found, value = self.memory.get(key)
+        if found:
+            self.counters["l1Hits"] += 1
+            return value
+        self.counters["l1Misses"] += 1
+
+        value, expires, size = self._load(key)
+        if value is None:
+            self.counters["l2Misses"] += 1
+            return None
+        self.counters["l2Hits"] += 1
+
+        self.memory.set(key, value, size, expires)
+        return value
+
+    def set(self, key, value, timeout=None, mgmt_element=False):
+        result = super().set(key, value, timeout, mgmt_element)
+
+        if not mgmt_element:
+            self.memory.delete(key)
+            if result:
+                filename = self._get_filename(key)
+                self.memory.set(key, value, os.path.getsize(filename), self._normalize_timeout(timeout))
+
+        return result
+
+    def delete(self, key, mgmt_element=False):
+        self.memory.delete(key)
+        return super().delete(key, mgmt_element)
+
+    def has(self, key):
+        found, _ = self.memory.get(key)
+        return found or super().has(key)
+
+    def clear(self):
+        result = super().clear()
+        self.memory.clear()
+        self._bump_generation()
+        return result
+
+    def get_generation(self):
+        """Returns the generation of the cache, changed by clearing it in any process"""
+        self._check_generation()
+        return self.generation
+
+    def stats(self) -> dict:
+        return {
+            "l1": {**self.memory.stats(), "hits": self.counters["l1Hits"], "misses": self.counters["l1Misses"]},
+            "l2": {"hits": self.counters["l2Hits"], "misses": self.counters["l2Misses"]},
+        }
+
+    def _load(self, key):
+        """Reads a value from disk, along with its expiration and serialized size"""
+        filename = self._get_filename(key)
+        try:
+            with self._safe_stream_open(filename, "rb") as f:
+                expires = struct.unpack("I", f.read(4))[0]
+                if expires == 0 or expires >= time():
+                    size = os.fstat(f.fileno()).st_size
+                    return self.serializer.load(f), expires, size
+        except FileNotFoundError:
+            pass
+        except (OSError, EOFError, struct.error):
+            logging.warning("Exception raised while handling cache file '%s'", filename, exc_info=True)
+        return None, 0, 0
+
+    def _check_generation(self):
+        if self.generation_file is None:
+            return
+
+        now = monotonic()
+        if now < self.next_generation_check:
+            return
+        self.next_generation_check = now + self.check_interval
+
+        try:
+            generation = os.stat(self.generation_file).st_mtime_ns
+        except FileNotFoundError:
+            generation = 0
+
+        if generation != self.generation:
+            if self.generation is not None:
+                self.memory.clear()  # cleared by another process
+            self.generation = generation
+
+    def _bump_generation(self):
+        if self.generation_file is None:
+            return
+
+        os.makedirs(os.path.dirname(self.generation_file), exist_ok=True)
+        with open(self.generation_file, "w") as file:
+            file.write(str(time()))
+
+        self.generation = os.stat(self.generation_file).st_mtime_ns
 
 
 def get_cache():
     return cache
 
 
+def get_derived_cache():
+    """Returns the cache of parsed chapters, ETags and compressed bodies, with its own directory and threshold"""
+    return derived_cache
+
+
+def get_cache_stats() -> dict:
+    return {**cache.cache.stats(), "derived": derived_cache.cache.stats()}
+
+
+def get_cache_generation():
+    return cache.cache.get_generation()
+
+
+def get_lock_dir() -> str:
+    return settings["CACHE_LOCK_DIR"]
+
+
+def get_lock_timeout() -> float:
+    return settings["CACHE_LOCK_TIMEOUT"]
+
+
+def get_jittered_timeout() -> int:
+    """Randomizes the default timeout, so entries written together don't expire together"""
+    jitter = settings["CACHE_TIMEOUT_JITTER"]
+    return max(1, int(int(settings["CACHE_DEFAULT_TIMEOUT"]) * random.uniform(1 - jitter, 1 + jitter)))
+
+
+def get_stale_window() -> int:
+    return settings["CACHE_STALE_WINDOW"]
+
+
+def get_negative_timeout() -> int:
+    return settings["CACHE_NEGATIVE_TIMEOUT"]
+
+
 @click.command("clear-cache")
 def clear_cache_command():
     cache.clear()
+    derived_cache.clear()
     click.echo("Cleared the cache")
 
 
+@click.command("warm-cache")
+@click.argument("version_ids", nargs=-1)
+@click.option("--scope", type=click.Choice(["lists", "top", "full"]), default="lists", show_default=True,
+              help="Books and chapters lists only, the lists and the most marked chapters, or whole versions.")
+@click.option("--top", default=50, show_default=True, help="Number of chapters of the top scope.")
+@click.option("--workers", default=4, show_default=True, help="Concurrent upstream requests.")
+def warm_cache_command(version_ids, scope, top, workers):
+    """Loads versions (all supported by default) into the cache."""
+    from biblemark.service.warm_service import warm_cache
+    from biblemark.service.bible_service import get_versions
+
+    if not version_ids:
+        version_ids = [version["id"] for version in get_versions()]
+
+    for version_id in version_ids:
+        warm_cache(version_id, scope, top, workers, click.echo)
+    click.echo("Warmed the cache")
+
+
 def init_app(app):
+    for key in settings:
+        settings[key] = app.config.get(key, settings[key])
+
     cache.init_app(app, config={
-        "CACHE_TYPE": "FileSystemCache",
+        "CACHE_TYPE": "biblemark.config.cache.TieredFileSystemCache",
         "DEBUG": app.debug,
         "CACHE_DEFAULT_TIMEOUT": app.config["CACHE_DEFAULT_TIMEOUT"],  # 3600s = 1h
         "CACHE_DIR": app.config["CACHE_DIR"],
         "CACHE_THRESHOLD": app.config["CACHE_THRESHOLD"],
+        "CACHE_L1_MAX_BYTES": app.config["CACHE_L1_MAX_BYTES"],
+        "CACHE_L1_CHECK_INTERVAL": app.config["CACHE_L1_CHECK_INTERVAL"],
+        "CACHE_GENERATION_FILE": os.path.join(settings["CACHE_LOCK_DIR"], "cache.generation"),
+    })
+    derived_cache.init_app(app, config={
+        "CACHE_TYPE": "biblemark.config.cache.TieredFileSystemCache",
+        "DEBUG": app.debug,
+        "CACHE_DEFAULT_TIMEOUT": app.config["CACHE_DEFAULT_TIMEOUT"],
+        "CACHE_DIR": app.config["CACHE_DERIVED_DIR"],
+        "CACHE_THRESHOLD": app.config["CACHE_DERIVED_THRESHOLD"],
+        "CACHE_L1_MAX_BYTES": app.config["CACHE_DERIVED_L1_MAX_BYTES"],
+        "CACHE_L1_CHECK_INTERVAL": app.config["CACHE_L1_CHECK_INTERVAL"],
+        "CACHE_GENERATION_FILE": os.path.join(settings["CACHE_LOCK_DIR"], "derived.generation"),
     })
     app.cli.add_command(clear_cache_command)
+    app.cli.add_command(warm_cache_command)
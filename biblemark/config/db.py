@@ -1,27 +1,159 @@
+import atexit
+import logging
+import os
+import re
 import sqlite3
+import threading
+from contextlib import contextmanager
 
 import click
-from flask import current_app
+from flask import current_app, has_request_context, request
 from flask import g
 
+from biblemark.config.versions import bump_generation
+from biblemark.utils.connection_pool import ConnectionPool
+from config import Config
+
+MIGRATION_FILE = re.compile(r"(\d+)_\w+\.sql")  # e.g. 0001_mark_indexes.sql
+READ_METHODS = ("GET", "HEAD")
+
+settings = {
+    "DATABASE_POOL_SIZE": Config.DATABASE_POOL_SIZE,
+    "DATABASE_READ_CONNECTIONS": Config.DATABASE_READ_CONNECTIONS,
+    "DATABASE_JOURNAL_MODE": Config.DATABASE_JOURNAL_MODE,
+    "DATABASE_SYNCHRONOUS": Config.DATABASE_SYNCHRONOUS,
+    "DATABASE_CACHE_SIZE": Config.DATABASE_CACHE_SIZE,
+    "DATABASE_MMAP_SIZE": Config.DATABASE_MMAP_SIZE,
+    "DATABASE_BUSY_TIMEOUT": Config.DATABASE_BUSY_TIMEOUT,
+    "DATABASE_FOREIGN_KEYS": Config.DATABASE_FOREIGN_KEYS,
+}
+
+pools = {}  # (database file, read-only) -> ConnectionPool of this process
+pools_lock = threading.Lock()
+
+
+def connect(database: str, read_only: bool = False) -> sqlite3.Connection:
+    """
+    Opens a connection tuned by the database settings.
+
+    The journal mode is persisted in the database file, so it is only set by write connections.
+    Read connections are query-only, so a write attempted by them fails instead of taking the write lock.
+    """
+    db = sqlite3.connect(
+        database,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        timeout=settings["DATABASE_BUSY_TIMEOUT"] / 1000,
+        check_same_thread=False,  # pooled, though used by a single thread at a time
+    )
+    db.row_factory = sqlite3.Row
+
+    if not read_only:
+        db.execute(f"PRAGMA journal_mode = {settings['DATABASE_JOURNAL_MODE']}")
+    db.execute(f"PRAGMA synchronous = {settings['DATABASE_SYNCHRONOUS']}")
+    db.execute(f"PRAGMA cache_size = {int(settings['DATABASE_CACHE_SIZE'])}")
+    db.execute(f"PRAGMA mmap_size = {int(settings['DATABASE_MMAP_SIZE'])}")
+    db.execute(f"PRAGMA busy_timeout = {int(settings['DATABASE_BUSY_TIMEOUT'])}")
+    db.execute(f"PRAGMA foreign_keys = {'ON' if settings['DATABASE_FOREIGN_KEYS'] else 'OFF'}")
+    if read_only:
+        db.execute("PRAGMA query_only = ON")
+
+    return db
+
+
+def get_pool(database: str, read_only: bool) -> ConnectionPool:
+    key = (database, read_only)
+
+    with pools_lock:
+        if key not in pools:
+            pools[key] = ConnectionPool(lambda: connect(database, read_only), settings["DATABASE_POOL_SIZE"])
+        return pools[key]
+
+
+def is_read_request() -> bool:
+    return settings["DATABASE_READ_CONNECTIONS"] and has_request_context() and request.method in READ_METHODS
+
 
 def get_db():
+    """Returns the connection of the app context, a read connection for GET requests if enabled"""
     if "db" not in g:
-        g.db = sqlite3.connect(
-            current_app.config["DATABASE_FILE"], detect_types=sqlite3.PARSE_DECLTYPES
-        )
-        g.db.row_factory = sqlite3.Row
+        g.db_pool = get_pool(current_app.config["DATABASE_FILE"], is_read_request())
+        g.db = g.db_pool.acquire()
 
     return g.db
 
 
 def close_db(e=None):
     db = g.pop("db", None)
+    pool = g.pop("db_pool", None)
+    g.pop("transaction_depth", None)
+
+    if db is None:
+        return
+
+    if pool is None:
+        db.close()  # set by hand, not pooled
+        return
 
-    if db is not None:
+    try:
+        pool.release(db)
+    except sqlite3.Error:
         db.close()
 
 
+def close_pools():
+    with pools_lock:
+        closing = list(pools.values())
+        pools.clear()
+
+    for pool in closing:
+        pool.close()
+
+
+atexit.register(close_pools)  # once per process, whatever the number of apps created
+
+
+def get_db_stats() -> dict:
+    with pools_lock:
+        current = dict(pools)
+
+    return {
+        "read" if read_only else "write": pool.stats()
+        for (_, read_only), pool in current.items()
+    }
+
+
+@contextmanager
+def transaction():
+    """
+    Applies the writes of the block in a single transaction, committed at the end of the outermost block.
+
+    A nested block is a savepoint, so its writes are rolled back alone if it raises.
+    """
+    db = get_db()
+    depth = g.get("transaction_depth", 0)
+    savepoint = f"transaction_{depth}"
+
+    db.execute(f"SAVEPOINT {savepoint}")  # also begins the transaction of the outermost block
+    g.transaction_depth = depth + 1
+
+    try:
+        yield db
+    except BaseException:
+        db.execute(f"ROLLBACK TO {savepoint}")
+        db.execute(f"RELEASE {savepoint}")
+        raise
+    else:
+        db.execute(f"RELEASE {savepoint}")  # commits, if the outermost
+    finally:
+        g.transaction_depth = depth
+
+
+def commit_db():
+    """Commits the writes so far, unless within a transaction block"""
+    if not g.get("transaction_depth"):
+        get_db().commit()
+
+
 def init_db():
     db = get_db()
 
@@ -31,6 +163,66 @@ def init_db():
     with current_app.open_resource(current_app.config["DATABASE_DATA_SCRIPT"]) as file:
         db.executescript(file.read().decode("utf8"))
 
+    migrate_db(db)
+
+    bump_generation()  # versions were reseeded
+
+
+def get_schema_version(db) -> int:
+    """Returns the number of the latest migration applied to the database"""
+    return db.execute("PRAGMA user_version").fetchone()[0]
+
+
+def list_migrations(directory: str) -> [(int, str)]:
+    """Returns the number and path of the migration scripts, in order"""
+    migrations = []
+
+    for name in os.listdir(directory):
+        match = MIGRATION_FILE.fullmatch(name)
+        if match:
+            migrations.append((int(match.group(1)), os.path.join(directory, name)))
+
+    return sorted(migrations)
+
+
+def list_pending_migrations(db) -> [(int, str)]:
+    version = get_schema_version(db)
+    return [
+        (number, path)
+        for number, path in list_migrations(current_app.config["DATABASE_MIGRATIONS_DIR"])
+        if number > version
+    ]
+
+
+def migrate_db(db) -> [int]:
+    """
+    Applies the migrations newer than the schema version of the database.
+
+    Each migration runs in its own transaction, together with the schema version update,
+    so a failed migration leaves the database at the previous version. Workers starting
+    together may race to apply the same migration, which the losers skip.
+
+    :return: numbers of the migrations applied
+    """
+    applied = []
+
+    for number, path in list_pending_migrations(db):
+        with open(path, encoding="utf8") as file:
+            script = file.read()
+
+        try:
+            db.executescript(f"BEGIN IMMEDIATE;\n{script}\nPRAGMA user_version = {number};\nCOMMIT;")
+        except sqlite3.Error:
+            if db.in_transaction:
+                db.rollback()
+            if get_schema_version(db) >= number:
+                continue  # applied by another process meanwhile
+            raise
+
+        applied.append(number)
+
+    return applied
+
 
 @click.command("init-db")
 def init_db_command():
@@ -38,6 +230,46 @@ def init_db_command():
     click.echo("Initialized the database")
 
 
+@click.command("migrate-db")
+def migrate_db_command():
+    """Upgrades an existing database to the latest schema version."""
+    applied = migrate_db(get_db())
+
+    if applied:
+        click.echo(f"Applied migrations {', '.join(str(number) for number in applied)}")
+    else:
+        click.echo("The database is up to date")
+
+
 def init_app(app):
+    for key in settings:
+        settings[key] = app.config.get(key, settings[key])
+
+    close_pools()  # connections of the previous settings
+
     app.teardown_appcontext(close_db)
     app.cli.add_command(init_db_command)
+    app.cli.add_command(migrate_db_command)
+
+    with app.app_context():
+        try:
+            db = get_db()
+            initialized = db.execute("SELECT count(*) FROM sqlite_master").fetchone()[0] > 0
+        except (sqlite3.Error, OSError):
+            return  # reported by the first query
+
+        if initialized:
+            upgrade_on_start(db, app.config["DATABASE_MIGRATE_ON_START"])
+
+
+def upgrade_on_start(db, migrate: bool):
+    """Applies pending migrations before serving, or refuses to start, as queries depend on the latest schema"""
+    if not list_pending_migrations(db):
+        return
+
+    if not migrate:
+        raise RuntimeError("The database schema is behind, run migrate-db to upgrade it")
+
+    applied = migrate_db(db)
+    if applied:
+        logging.warning("Applied migrations %s on start", ", ".join(str(number) for number in applied))
@@ -0,0 +1,294 @@
+import atexit
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed
+from time import monotonic
+from typing import Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+from biblemark.utils.circuit_breaker import CircuitBreaker
+from biblemark.utils.latency_window import LatencyWindow
+from biblemark.utils.request_scheduler import RequestScheduler, Priority
+from config import Config
+
+DEFAULT_HEDGE_DELAY = 1.0  # seconds, until there are enough samples for the p95 latency
+
+settings = {
+    "HTTP_TIMEOUT": Config.HTTP_TIMEOUT,
+    "HTTP_POOL_SIZE": Config.HTTP_POOL_SIZE,
+    "HTTP_POOL_BLOCK": Config.HTTP_POOL_BLOCK,
+    "HTTP_KEEPALIVE_IDLE": Config.HTTP_KEEPALIVE_IDLE,
+    "HTTP_RETRY_TOTAL": Config.HTTP_RETRY_TOTAL,
+    "HTTP_RETRY_BACKOFF": Config.HTTP_RETRY_BACKOFF,
+    "HTTP_HEDGE_ENABLED": Config.HTTP_HEDGE_ENABLED,
+    "HTTP_HEDGE_DELAY": Config.HTTP_HEDGE_DELAY,
+    "HTTP_HEDGE_MIN_DELAY": Config.HTTP_HEDGE_MIN_DELAY,
+    "BREAKER_FAILURE_RATE": Config.BREAKER_FAILURE_RATE,
+    "BREAKER_WINDOW": Config.BREAKER_WINDOW,
+    "BREAKER_MIN_CALLS": Config.BREAKER_MIN_CALLS,
+    "BREAKER_COOLDOWN": Config.BREAKER_COOLDOWN,
+    "API_BIBLE_APP_KEYS": Config.API_BIBLE_APP_KEYS,
+    "API_BIBLE_RATE_LIMIT": Config.API_BIBLE_RATE_LIMIT,
+    "API_BIBLE_BURST": Config.API_BIBLE_BURST,
+    "API_BIBLE_QUOTA": Config.API_BIBLE_QUOTA,
+    "API_BIBLE_QUOTA_PERIOD": Config.API_BIBLE_QUOTA_PERIOD,
+    "API_BIBLE_RESERVE_ENRICHMENT": Config.API_BIBLE_RESERVE_ENRICHMENT,
+    "API_BIBLE_RESERVE_BACKGROUND": Config.API_BIBLE_RESERVE_BACKGROUND,
+    "API_BIBLE_MAX_WAIT": Config.API_BIBLE_MAX_WAIT,
+}
+
+session = None
+session_lock = threading.Lock()
+
+hedge_executor = None
+latencies = LatencyWindow()
+hedge_counters = {"hedged": 0, "hedgeWins": 0}
+
+breaker = None
+scheduler = None
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTP adapter enabling TCP keep-alive probes on pooled connections"""
+
+    def __init__(self, keepalive_idle: int, **kwargs):
+        self.keepalive_idle = keepalive_idle
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = HTTPConnection.default_socket_options + keepalive_socket_options(self.keepalive_idle)
+        super().init_poolmanager(*args, **kwargs)
+
+    def stats(self) -> dict:
+        """Sums the request and connection counters of every host pool"""
+        requests_count = 0
+        connections_count = 0
+
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                requests_count += pool.num_requests
+                connections_count += pool.num_connections
+
+        return {
+            "requests": requests_count,
+            "connections": connections_count,
+            "reused": max(0, requests_count - connections_count),
+        }
+
+
+def keepalive_socket_options(idle: int) -> list:
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+    # TCP_KEEPIDLE on Linux, TCP_KEEPALIVE on macOS
+    idle_option = getattr(socket, "TCP_KEEPIDLE", None) or getattr(socket, "TCP_KEEPALIVE", None)
+    if idle_option is not None:
+        options.append((socket.IPPROTO_TCP, idle_option, idle))
+
+    return options
+
+
+def create_session() -> requests.Session:
+    retry = Retry(
+        total=settings["HTTP_RETRY_TOTAL"],
+        backoff_factor=settings["HTTP_RETRY_BACKOFF"],
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = KeepAliveAdapter(
+        keepalive_idle=settings["HTTP_KEEPALIVE_IDLE"],
+        pool_connections=1,  # a single upstream host
+        pool_maxsize=settings["HTTP_POOL_SIZE"],
+        pool_block=settings["HTTP_POOL_BLOCK"],
+        max_retries=retry,
+    )
+
+    new_session = requests.Session()
+    new_session.mount("https://", adapter)
+    new_session.mount("http://", adapter)
+
+    return new_session
+
+
+def get_session() -> requests.Session:
+    """Returns the process-wide session, shared by every thread"""
+    global session
+
+    if session is None:
+        with session_lock:
+            if session is None:
+                session = create_session()
+
+    return session
+
+
+def get_timeout() -> float:
+    return settings["HTTP_TIMEOUT"]
+
+
+def get_breaker() -> CircuitBreaker:
+    global breaker
+
+    if breaker is None:
+        with session_lock:
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    failure_rate=settings["BREAKER_FAILURE_RATE"],
+                    window=settings["BREAKER_WINDOW"],
+                    min_calls=settings["BREAKER_MIN_CALLS"],
+                    cooldown=settings["BREAKER_COOLDOWN"],
+                )
+
+    return breaker
+
+
+def get_scheduler() -> RequestScheduler:
+    global scheduler
+
+    if scheduler is None:
+        with session_lock:
+            if scheduler is None:
+                scheduler = RequestScheduler(
+                    keys=settings["API_BIBLE_APP_KEYS"],
+                    rate=settings["API_BIBLE_RATE_LIMIT"],
+                    burst=settings["API_BIBLE_BURST"],
+                    quota=settings["API_BIBLE_QUOTA"],
+                    period=settings["API_BIBLE_QUOTA_PERIOD"],
+                    reserves={
+                        Priority.INTERACTIVE: 0,
+                        Priority.ENRICHMENT: settings["API_BIBLE_RESERVE_ENRICHMENT"],
+                        Priority.BACKGROUND: settings["API_BIBLE_RESERVE_BACKGROUND"],
+                    },
+                )
+
+    return scheduler
+
+
+def get_max_wait() -> float:
+    return settings["API_BIBLE_MAX_WAIT"]
+
+
+def get_hedge_delay() -> float:
+    """Returns the fixed hedge delay, if configured, or the p95 latency of the latest requests"""
+    if settings["HTTP_HEDGE_DELAY"]:
+        return settings["HTTP_HEDGE_DELAY"]
+
+    p95 = latencies.percentile(0.95)
+    if p95 is None:
+        return DEFAULT_HEDGE_DELAY
+    return max(settings["HTTP_HEDGE_MIN_DELAY"], p95)
+
+
+def get_hedge_executor() -> ThreadPoolExecutor:
+    global hedge_executor
+
+    if hedge_executor is None:
+        with session_lock:
+            if hedge_executor is None:
+                # a primary and a hedge for each pooled connection
+                hedge_executor = ThreadPoolExecutor(max_workers=2 * settings["HTTP_POOL_SIZE"],
+                                                    thread_name_prefix="hedge")
+
+    return hedge_executor
+
+
+def timed_get(url: str, **kwargs) -> requests.Response:
+    started = monotonic()
+    response = get_session().get(url, **kwargs)
+    latencies.add(monotonic() - started)
+    return response
+
+
+def hedged_get(url: str, can_hedge: Callable[[], bool] = None, **kwargs) -> requests.Response:
+    """
+    Sends a GET request, and a duplicate one if it takes longer than the hedge delay.
+
+    The first response to arrive is returned. It must only be used for idempotent requests.
+
+    :param can_hedge: called before sending the duplicate, which is not sent if it returns False
+    """
+    if not settings["HTTP_HEDGE_ENABLED"]:
+        return timed_get(url, **kwargs)
+
+    executor = get_hedge_executor()
+    primary = executor.submit(timed_get, url, **kwargs)
+
+    done, _ = wait([primary], timeout=get_hedge_delay())
+    if done or (can_hedge is not None and not can_hedge()):
+        return primary.result()
+
+    hedge_counters["hedged"] += 1
+    hedge = executor.submit(timed_get, url, **kwargs)
+    error = None
+
+    for future in as_completed([primary, hedge]):
+        try:
+            response = future.result()
+        except requests.RequestException as e:
+            error = e
+            continue
+
+        if future is hedge:
+            hedge_counters["hedgeWins"] += 1
+        return response
+
+    raise error
+
+
+def get_http_stats() -> dict:
+    pool = {"requests": 0, "connections": 0, "reused": 0}
+    if session is not None:
+        pool = session.get_adapter("https://").stats()
+
+    return {
+        **pool,
+        **hedge_counters,
+        "hedgeDelay": get_hedge_delay(),
+        "breaker": get_breaker().stats(),
+    }
+
+
+def get_quota_stats() -> dict:
+    return get_scheduler().stats()
+
+
+def close_session():
+    global session
+
+    with session_lock:
+        if session is not None:
+            session.close()
+            session = None
+
+
+atexit.register(close_session)  # once per process, whatever the number of apps created
+
+
+def init_app(app):
+    for key in settings:
+        settings[key] = app.config.get(key, settings[key])
+
+    global breaker, scheduler
+    breaker = None
+    scheduler = None
+
+    close_session()  # the next request picks up the app settings
+
+    validate_settings()
+
+
+def validate_settings():
+    """Refuses settings the request scheduler can't work with, instead of failing every upstream request"""
+    if not settings["API_BIBLE_APP_KEYS"]:
+        raise RuntimeError("No API.Bible key configured, set API_BIBLE_APP_KEY or API_BIBLE_APP_KEYS")
+
+    for key in ("API_BIBLE_RATE_LIMIT", "API_BIBLE_BURST", "API_BIBLE_QUOTA", "API_BIBLE_QUOTA_PERIOD"):
+        if not settings[key] > 0:
+            raise RuntimeError(f"{key} must be positive, got {settings[key]}")
@@ -0,0 +1,52 @@
+import click
+
+
+def get_user(username: str):
+    from biblemark.repository.user_repository import fetch_user_by_username
+
+    user = fetch_user_by_username(username)
+    if user is None:
+        raise click.ClickException(f"User {username} not found")
+    return user
+
+
+@click.command("export-marks")
+@click.argument("username")
+@click.option("--output", type=click.File("w", encoding="utf8"), default="-", help="NDJSON file, stdout by default.")
+def export_marks_command(username, output):
+    """Exports every mark of a user as NDJSON, in constant memory."""
+    from biblemark.converter.mark_converters import build_mark_records
+    from biblemark.service.mark_transfer_service import iterate_marks
+
+    for line in build_mark_records(iterate_marks(get_user(username))):
+        output.write(line)
+
+
+@click.command("import-marks")
+@click.argument("username")
+@click.option("--input", "input_file", type=click.File("r", encoding="utf8"), default="-",
+              help="NDJSON file, as exported, stdin by default.")
+def import_marks_command(username, input_file):
+    """Imports marks of a user from NDJSON, in transactional batches."""
+    from biblemark.service.mark_transfer_service import import_marks
+
+    summary = import_marks(get_user(username), input_file)
+
+    for error in summary["errors"]:
+        click.echo(error, err=True)
+    click.echo(f"Imported {summary['imported']} marks, skipped {summary['skipped']}")
+
+
+@click.command("reconcile-mark-counts")
+def reconcile_mark_counts_command():
+    """Rebuilds the highlight and note counters of every user from their marks."""
+    from biblemark.repository.mark_repository import reconcile_mark_counts
+
+    differences = reconcile_mark_counts()
+    click.echo(f"Rebuilt the mark counters, fixing the ones of {differences} users")
+
+
+def init_app(app):
+    app.cli.add_command(export_marks_command)
+    app.cli.add_command(import_marks_command)
+    app.cli.add_command(reconcile_mark_counts_command)
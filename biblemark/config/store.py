@@ -0,0 +1,37 @@
+import click
+
+from config import Config
+
+settings = {
+    "STORE_DIR": Config.STORE_DIR,
+    "STORE_CHECK_INTERVAL": Config.STORE_CHECK_INTERVAL,
+}
+
+
+def get_store_dir() -> str:
+    return settings["STORE_DIR"]
+
+
+def get_store_check_interval() -> float:
+    return settings["STORE_CHECK_INTERVAL"]
+
+
+@click.command("pack-version")
+@click.argument("version_ids", nargs=-1)
+@click.option("--workers", default=4, show_default=True, help="Concurrent upstream requests.")
+def pack_version_command(version_ids, workers):
+    """Crawls versions (all supported by default) into packed local chapter stores."""
+    from biblemark.service.chapter_store_service import pack_version
+    from biblemark.service.bible_service import get_versions
+
+    if not version_ids:
+        version_ids = [version["id"] for version in get_versions()]
+
+    for version_id in version_ids:
+        pack_version(version_id, workers, click.echo)
+
+
+def init_app(app):
+    for key in settings:
+        settings[key] = app.config.get(key, settings[key])
+    app.cli.add_command(pack_version_command)
@@ -0,0 +1,114 @@
+import logging
+import os
+import sqlite3
+import threading
+from time import monotonic
+from types import MappingProxyType
+from typing import Optional
+
+import click
+from flask import g, has_app_context
+
+from biblemark.model.bible_version import Version
+from config import Config
+
+settings = {
+    "VERSIONS_GENERATION_FILE": os.path.join(Config.CACHE_LOCK_DIR, "versions.generation"),
+    "VERSIONS_CHECK_INTERVAL": Config.VERSIONS_CHECK_INTERVAL,
+}
+
+registry = None
+registry_lock = threading.Lock()
+next_check = 0.0
+
+
+class VersionRegistry:
+    """
+    Immutable snapshot of the versions table.
+
+    Every lookup of the same version returns the same instance, which must be treated as read-only.
+    """
+
+    def __init__(self, versions: [Version], generation: int):
+        self.versions = MappingProxyType({version.get_internal_id(): version for version in versions})
+        self.supported = tuple(version for version in self.versions.values() if not version.disabled)
+        self.generation = generation
+
+    def get(self, internal_id: str) -> Optional[Version]:
+        """Returns a version, even if disabled"""
+        return self.versions.get(internal_id)
+
+    def get_supported(self, internal_id: str) -> Optional[Version]:
+        version = self.versions.get(internal_id)
+        return version if version is not None and not version.disabled else None
+
+
+def get_version_registry() -> VersionRegistry:
+    """
+    Returns the registry, reloading it if the versions changed since it was loaded.
+
+    The generation file is checked at most once per interval, and the same snapshot
+    is kept for the rest of a request.
+    """
+    if has_app_context() and "versions" in g:
+        return g.versions
+
+    global registry, next_check
+
+    now = monotonic()
+    if registry is None or now >= next_check:
+        with registry_lock:
+            generation = read_generation()
+            if registry is None or registry.generation != generation:
+                registry = load_registry(generation)
+            next_check = now + settings["VERSIONS_CHECK_INTERVAL"]
+
+    if has_app_context():
+        g.versions = registry
+
+    return registry
+
+
+def load_registry(generation: int) -> VersionRegistry:
+    from biblemark.repository.bible_repository import fetch_all_versions
+
+    return VersionRegistry(fetch_all_versions(), generation)
+
+
+def read_generation() -> int:
+    try:
+        return os.stat(settings["VERSIONS_GENERATION_FILE"]).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def bump_generation():
+    """Signals every process to reload the registry on its next check"""
+    path = settings["VERSIONS_GENERATION_FILE"]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(str(monotonic()))
+
+
+@click.command("reload-versions")
+def reload_versions_command():
+    """Reloads the versions table in every running process, after it's changed."""
+    bump_generation()
+    click.echo("Signaled the versions reload")
+
+
+def init_app(app):
+    settings["VERSIONS_GENERATION_FILE"] = os.path.join(app.config["CACHE_LOCK_DIR"], "versions.generation")
+    settings["VERSIONS_CHECK_INTERVAL"] = app.config.get("VERSIONS_CHECK_INTERVAL", settings["VERSIONS_CHECK_INTERVAL"])
+
+    global registry
+    registry = None
+
+    with app.app_context():
+        try:
+            get_version_registry()
+        except sqlite3.OperationalError:
+            # database not initialized yet, loaded on first use
+            logging.warning("Versions not loaded on start, the database is not initialized")
+
+    app.cli.add_command(reload_versions_command)
@@ -1,13 +1,18 @@
-from flask import Blueprint
+from flask import Blueprint, request
 
 from biblemark.converter.bible_converters import build_chapter_content_response
+from biblemark.exceptions.bible_http_exceptions import InvalidChapterFormat
+from biblemark.middleware.conditional_middleware import conditional
 from biblemark.middleware.jsonified_middleware import jsonified
-from biblemark.service.bible_service import get_versions, get_books, get_chapters, get_chapter_content
+from biblemark.service.bible_service import get_versions, get_books, get_chapters, get_chapter_content, get_version, \
+    get_chapter_verses
+from biblemark.service.prefetch_service import prefetch_adjacent_chapters
 
 bp = Blueprint("api/bible", __name__, url_prefix="/api")
 
 
 @bp.route("/versions", methods=["GET"])
+@conditional(max_age_config="HTTP_CACHE_VERSIONS_MAX_AGE")
 @jsonified
 def retrieve_versions():
     """Endpoint for retrieving versions"""
@@ -16,6 +21,7 @@ def retrieve_versions():
 
 
 @bp.route("/versions/<version_id>/books", methods=["GET"])
+@conditional()
 @jsonified
 def retrieve_books(version_id):
     """Endpoint for retrieving books of a specific version"""
@@ -24,6 +30,7 @@ def retrieve_books(version_id):
 
 
 @bp.route("/versions/<version_id>/books/<book_id>/chapters", methods=["GET"])
+@conditional()
 @jsonified
 def retrieve_chapters(version_id, book_id):
     """Endpoint for retrieving chapters of a specific book in a version"""
@@ -32,8 +39,23 @@ def retrieve_chapters(version_id, book_id):
 
 
 @bp.route("/versions/<version_id>/books/<book_id>/chapters/<chapter_id>", methods=["GET"])
+@conditional()
 @jsonified
 def retrieve_chapter_content(version_id, book_id, chapter_id):
-    """Endpoint for retrieving a specific chapter content"""
+    """
+    Endpoint for retrieving a specific chapter content
+
+    With format=verses, the verses are also listed with their plain text and offsets in the content.
+    """
+    response_format = request.args.get("format", "html")
+    if response_format not in ("html", "verses"):
+        raise InvalidChapterFormat(f"Chapter format {response_format} not supported")
+
     chapter_content = get_chapter_content(version_id, book_id, chapter_id)
-    return build_chapter_content_response(version_id, chapter_content)
+    prefetch_adjacent_chapters(get_version(version_id), chapter_content)
+
+    verses = None
+    if response_format == "verses":
+        verses = get_chapter_verses(version_id, chapter_content["id"])
+
+    return build_chapter_content_response(version_id, chapter_content, verses)
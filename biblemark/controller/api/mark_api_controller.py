@@ -1,29 +1,20 @@
-from flask import Blueprint, request, json, g, abort
+from flask import Blueprint, request, json, g, abort, Response, stream_with_context
 
-from biblemark.converter.mark_converters import build_mark_creation_response, serialize_mark
+from biblemark.converter.mark_converters import build_mark_creation_response, serialize_mark, serialize_enriched_mark, \
+    build_mark_batch_response, build_mark_records
+from biblemark.converter.pagination_converter import build_cursor_paginated_response, parse_page_args
 from biblemark.middleware.authenticated_middleware import authenticated
 from biblemark.middleware.jsonified_middleware import jsonified
-from biblemark.repository.mark_repository import soft_delete_marked_verses_by_ids
-from biblemark.service.mark_service import create_mark, remove_mark, update_note_content_by
+from biblemark.repository.mark_repository import count_highlights_by_user, count_notes_by_user
+from biblemark.service.mark_service import create_mark, remove_mark, update_note_content_by, \
+    get_highlights_page_by_user, get_notes_page_by_user, validate_mark_payload, hide_highlighted_verses, \
+    apply_mark_operations, validate_mark_location
 from biblemark.service.mark_service import get_marks_by_user_and_chapter
+from biblemark.service.mark_transfer_service import iterate_marks, import_marks
 
 bp = Blueprint("api/marks", __name__, url_prefix="/api/marks")
 
-
-def validate_mark_payload(payload):
-    mark = payload.get("mark", {})
-
-    color = mark.get("color")
-    note = mark.get("note")
-
-    # highlight XOR note
-    valid_combinations = [
-        (color is not None and note is None),  # highlight
-        (color is None and note is not None),  # note
-    ]
-
-    if not any(valid_combinations):
-        raise ValueError("Invalid mark payload")
+MAX_BATCH_OPERATIONS = 100
 
 
 def validate_marked_verse_ids(input_marked_verse_ids):
@@ -47,6 +38,40 @@ def get_visible_marks_in_chapter(version_id, book_id, chapter_id):
     }
 
 
+@bp.route("/highlights", methods=["GET"])
+@authenticated
+@jsonified
+def list_highlights():
+    """
+    Endpoint for listing highlights, newest first
+
+    Pages are requested with the previous or next cursor of the current page, or by page number.
+    """
+    page = parse_page_args(request.args)
+
+    total_elements = count_highlights_by_user(g.principal)
+
+    content = get_highlights_page_by_user(g.principal, **page)
+    serialized = list(map(lambda item: serialize_enriched_mark(item["mark"], item["passages"]), content["content"]))
+    return build_cursor_paginated_response(page["size"], total_elements, page["number"], serialized,
+                                           content["hasPrevious"], content["hasNext"])
+
+
+@bp.route("/notes", methods=["GET"])
+@authenticated
+@jsonified
+def list_notes():
+    """Endpoint for listing notes, newest first"""
+    page = parse_page_args(request.args)
+
+    total_elements = count_notes_by_user(g.principal)
+
+    content = get_notes_page_by_user(g.principal, **page)
+    serialized = list(map(lambda item: serialize_enriched_mark(item["mark"], item["passages"]), content["content"]))
+    return build_cursor_paginated_response(page["size"], total_elements, page["number"], serialized,
+                                           content["hasPrevious"], content["hasNext"])
+
+
 @bp.route("/", methods=["POST"])
 @authenticated
 @jsonified
@@ -54,11 +79,54 @@ def create():
     """Endpoint for creating a mark"""
     payload = json.loads(request.data)
     validate_mark_payload(payload)
+    validate_mark_location(payload)
 
     data = create_mark(payload)
     return build_mark_creation_response(request=payload, mark=data)
 
 
+@bp.route("/batch", methods=["POST"])
+@authenticated
+@jsonified
+def apply_batch():
+    """
+    Endpoint for applying many mark operations at once, in a single transaction
+
+    Each operation is a creation, update, hide or deletion, with the payload of its own endpoint.
+    """
+    payload = json.loads(request.data)
+    operations = payload.get("operations")
+
+    if not isinstance(operations, list) or not operations:
+        abort(400, description="No operations provided")
+
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        abort(400, description=f"Too many operations, up to {MAX_BATCH_OPERATIONS} per batch")
+
+    results = apply_mark_operations(operations)
+    return build_mark_batch_response(operations, results)
+
+
+@bp.route("/export", methods=["GET"])
+@authenticated
+def export():
+    """Endpoint for exporting every mark as NDJSON, streamed in constant memory"""
+    user = g.principal
+    return Response(
+        stream_with_context(build_mark_records(iterate_marks(user))),
+        mimetype="application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename={user.username}-marks.ndjson"},
+    )
+
+
+@bp.route("/import", methods=["POST"])
+@authenticated
+@jsonified
+def import_():
+    """Endpoint for importing marks from NDJSON, as exported, read as a stream"""
+    return import_marks(g.principal, request.stream)
+
+
 @bp.route("/highlights", methods=["DELETE"])
 @authenticated
 @jsonified
@@ -67,8 +135,7 @@ def hide_verse_highlights():
     input_marked_verse_ids = request.args.get("markedVerses")
     validate_marked_verse_ids(input_marked_verse_ids)
 
-    marked_verse_ids = input_marked_verse_ids.split(",")
-    soft_delete_marked_verses_by_ids(marked_verse_ids)
+    hide_highlighted_verses(input_marked_verse_ids.split(","))
 
 
 @bp.route("/<mark_id>", methods=["PATCH"])
@@ -0,0 +1,18 @@
+from flask import Blueprint, g
+
+from biblemark.converter.bible_converters import build_chapter_content_response
+from biblemark.converter.mark_converters import serialize_mark
+from biblemark.middleware.jsonified_middleware import jsonified
+from biblemark.service.reader_service import get_chapter_with_marks
+
+bp = Blueprint("api/reader", __name__, url_prefix="/api/reader")
+
+
+@bp.route("/versions/<version_id>/books/<book_id>/chapters/<chapter_id>", methods=["GET"])
+@jsonified
+def retrieve_chapter_with_marks(version_id, book_id, chapter_id):
+    """Endpoint for retrieving a chapter content along with the visible marks of the user, if authenticated"""
+    chapter_content, marks = get_chapter_with_marks(g.principal, version_id, book_id, chapter_id)
+    response = build_chapter_content_response(version_id, chapter_content)
+    response["marks"] = list(map(serialize_mark, marks))
+    return response
@@ -0,0 +1,32 @@
+from flask import Blueprint, abort, current_app, g
+
+from biblemark.config.cache import get_cache_stats
+from biblemark.config.db import get_db_stats
+from biblemark.config.http import get_http_stats, get_quota_stats
+from biblemark.middleware.authenticated_middleware import authenticated
+from biblemark.middleware.jsonified_middleware import jsonified
+from biblemark.service.external_bible_api_service import get_coalescing_stats, get_upstream_health, \
+    get_freshness_stats
+from biblemark.service.prefetch_service import get_prefetch_stats
+
+bp = Blueprint("api/stats", __name__, url_prefix="/api")
+
+
+@bp.route("/stats", methods=["GET"])
+@authenticated
+@jsonified
+def stats():
+    """Endpoint for retrieving runtime counters of this worker process, for the users of STATS_USERS"""
+    if g.principal.username not in current_app.config["STATS_USERS"]:
+        abort(403, description="Runtime counters are only available to the users of STATS_USERS")
+
+    return {
+        "cache": get_cache_stats(),
+        "http": get_http_stats(),
+        "quota": get_quota_stats(),
+        "coalescing": get_coalescing_stats(),
+        "freshness": get_freshness_stats(),
+        "upstream": get_upstream_health(),
+        "prefetch": get_prefetch_stats(),
+        "database": get_db_stats(),
+    }
@@ -1,5 +1,6 @@
 from flask import Blueprint, g
 
+from biblemark.converter.user_converters import serialize_user
 from biblemark.middleware.authenticated_middleware import authenticated
 from biblemark.middleware.jsonified_middleware import jsonified
 
@@ -12,10 +13,5 @@ bp = Blueprint("api/user", __name__, url_prefix="/api")
 def me():
     """Endpoint to retrieve authenticated user"""
     return {
-        "user": {
-            "id": g.principal.entity_id,
-            "username": g.principal.username,
-            "name": g.principal.name,
-            "created": g.principal.created,
-        }
+        "user": serialize_user(g.principal)
     }
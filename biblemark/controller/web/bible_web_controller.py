@@ -1,7 +1,12 @@
-from flask import abort, render_template, Blueprint, current_app
+from flask import abort, render_template, Blueprint, current_app, g
 
-from biblemark.exceptions.bible_http_exceptions import VersionNotFound, BookNotFound, ChapterNotFound
-from biblemark.service.bible_service import get_chapter_content
+from biblemark.converter.bible_converters import build_chapter_content_response
+from biblemark.converter.mark_converters import serialize_mark
+from biblemark.converter.user_converters import serialize_user
+from biblemark.exceptions.bible_http_exceptions import VersionNotFound, BookNotFound, ChapterNotFound, \
+    UpstreamResourceNotFound
+from biblemark.service.bible_service import get_versions, get_books, get_chapters
+from biblemark.service.reader_service import get_chapter_with_marks
 
 bp = Blueprint("pages", __name__)
 
@@ -20,8 +25,18 @@ def index(version_id=None, book_id=None, chapter_id=None):
         chapter_id = current_app.config["DEFAULT_CHAPTER_ID"]
 
     try:
-        get_chapter_content(version_id, book_id, chapter_id)
-    except (VersionNotFound, BookNotFound, ChapterNotFound):
+        chapter_content, marks = get_chapter_with_marks(g.principal, version_id, book_id, chapter_id)
+    except (VersionNotFound, BookNotFound, ChapterNotFound, UpstreamResourceNotFound):
         return abort(404)
-    else:
-        return render_template("bible/main.html")
+
+    # first paint data, the same the reader would otherwise request from the API
+    initial_state = {
+        "user": serialize_user(g.principal),
+        "versions": get_versions(),
+        "books": get_books(version_id),
+        "chapters": get_chapters(version_id, chapter_content["bookId"]),
+        "chapter": build_chapter_content_response(version_id, chapter_content),
+        "marks": list(map(serialize_mark, marks)),
+    }
+
+    return render_template("bible/main.html", initial_state=initial_state)
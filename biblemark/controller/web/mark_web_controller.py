@@ -1,35 +1,25 @@
 from flask import g, render_template, Blueprint, request
 
 from biblemark.converter.mark_converters import serialize_enriched_mark
-from biblemark.converter.pagination_converter import build_paginated_response
+from biblemark.converter.pagination_converter import build_cursor_paginated_response, parse_page_args
 from biblemark.middleware.authenticated_middleware import authenticated
 from biblemark.repository.mark_repository import count_highlights_by_user, count_notes_by_user
-from biblemark.service.mark_service import get_highlights_by_user, get_notes_by_user
+from biblemark.service.mark_service import get_highlights_page_by_user, get_notes_page_by_user
 
 bp = Blueprint("mark", __name__)
 
 
-DEFAULT_PAGE_SIZE = 30
-
-
-def validate_page_size(page_size):
-    if page_size not in [1, 5, 10, 30, 50, 100]:
-        raise ValueError("Invalid page size as pagination parameter")
-
-
 @bp.route("/highlights", methods=["GET"])
 @authenticated
 def highlights():
-    page_size = request.args.get("size", default=DEFAULT_PAGE_SIZE, type=int)
-    validate_page_size(page_size)
-
-    page_number = max(1, request.args.get("page", default=1, type=int)) - 1
+    page = parse_page_args(request.args)
 
     total_elements = count_highlights_by_user(g.principal)
 
-    content = get_highlights_by_user(g.principal, page_number, page_size)
-    serialized = list(map(lambda item: serialize_enriched_mark(item["mark"], item["passages"]), content))
-    paginated = build_paginated_response(page_size, total_elements, page_number, serialized)
+    content = get_highlights_page_by_user(g.principal, **page)
+    serialized = list(map(lambda item: serialize_enriched_mark(item["mark"], item["passages"]), content["content"]))
+    paginated = build_cursor_paginated_response(page["size"], total_elements, page["number"], serialized,
+                                                content["hasPrevious"], content["hasNext"])
 
     return render_template(
         "marks/highlights.html",
@@ -38,23 +28,23 @@ def highlights():
         size=paginated["page"]["size"],
         elements=paginated["page"]["totalElements"],
         pages=paginated["page"]["totalPages"],
-        page=paginated["page"]["number"]+1
+        page=paginated["page"]["number"]+1,
+        previous=paginated["page"]["previous"],
+        next=paginated["page"]["next"]
     )
 
 
 @bp.route("/notes", methods=["GET"])
 @authenticated
 def notes():
-    page_size = request.args.get("size", default=DEFAULT_PAGE_SIZE, type=int)
-    validate_page_size(page_size)
-
-    page_number = max(1, request.args.get("page", default=1, type=int)) - 1
+    page = parse_page_args(request.args)
 
     total_elements = count_notes_by_user(g.principal)
 
-    content = get_notes_by_user(g.principal, page_number, page_size)
-    serialized = list(map(lambda item: serialize_enriched_mark(item["mark"], item["passages"]), content))
-    paginated = build_paginated_response(page_size, total_elements, page_number, serialized)
+    content = get_notes_page_by_user(g.principal, **page)
+    serialized = list(map(lambda item: serialize_enriched_mark(item["mark"], item["passages"]), content["content"]))
+    paginated = build_cursor_paginated_response(page["size"], total_elements, page["number"], serialized,
+                                                content["hasPrevious"], content["hasNext"])
 
     return render_template(
         "marks/notes.html",
@@ -62,5 +52,7 @@ def notes():
         size=paginated["page"]["size"],
         elements=paginated["page"]["totalElements"],
         pages=paginated["page"]["totalPages"],
-        page=(paginated["page"]["number"] + 1)
+        page=(paginated["page"]["number"] + 1),
+        previous=paginated["page"]["previous"],
+        next=paginated["page"]["next"]
     )
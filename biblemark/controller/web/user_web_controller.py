@@ -2,7 +2,8 @@ from flask import Blueprint, request, redirect, url_for, flash, render_template,
 
 from biblemark.middleware.authenticated_middleware import authenticated
 from biblemark.model.user import User
-from biblemark.repository.mark_repository import count_highlights_by_user, count_notes_by_user
+from biblemark.repository.mark_repository import count_highlights_by_user, count_notes_by_user, \
+    count_highlights_by_user_and_color
 from biblemark.service.user_service import UsernameUnavailableError, register_user
 
 bp = Blueprint("user", __name__)
@@ -48,9 +49,11 @@ def register():
 def profile():
     highlights = count_highlights_by_user(g.principal)
     notes = count_notes_by_user(g.principal)
+    colors = count_highlights_by_user_and_color(g.principal)
 
     return render_template("user/profile.html",
                            user=g.principal,
                            highlights=highlights,
                            notes=notes,
+                           colors=colors,
                            )
@@ -1,5 +1,5 @@
-def build_chapter_content_response(version_id: str, chapter_content: dict) -> dict:
-    return {
+def build_chapter_content_response(version_id: str, chapter_content: dict, verses: [dict] = None) -> dict:
+    response = {
         "chapter": {
             "versionId": version_id,
             "bookId": chapter_content["bookId"],
@@ -10,6 +10,11 @@ def build_chapter_content_response(version_id: str, chapter_content: dict) -> di
         "_links": build_chapter_content_hateoas(version_id, chapter_content)
     }
 
+    if verses is not None:
+        response["chapter"]["verses"] = verses
+
+    return response
+
 
 def build_chapter_content_hateoas(version_id, chapter_content):
     links = {
@@ -1,4 +1,5 @@
-from typing import List
+import json
+from typing import Iterable, Iterator, List
 
 from biblemark.model.bible_reference_formatter import BibleReferenceFormatter
 from biblemark.model.mark import Mark
@@ -14,6 +15,22 @@ def build_mark_creation_response(request: dict, mark: Mark) -> dict:
     return serialize_mark(mark)
 
 
+def build_mark_batch_response(operations: List[dict], results: List[dict]) -> dict:
+    serialized = []
+
+    for operation, result in zip(operations, results):
+        if "error" in result:
+            serialized.append({"status": result["status"], "description": result["error"].description})
+        elif result["mark"] is None:
+            serialized.append({"status": result["status"]})
+        elif operation["op"] == "create":
+            serialized.append({"status": result["status"], "mark": build_mark_creation_response(operation, result["mark"])})
+        else:
+            serialized.append({"status": result["status"], "mark": serialize_mark(result["mark"])})
+
+    return {"results": serialized}
+
+
 def serialize_enriched_mark(mark: Mark, passages: List[dict]) -> dict:
     serialized_mark = serialize_mark(mark)
     serialized_mark["passages"] = passages
@@ -37,3 +54,27 @@ def serialize_mark(mark: Mark) -> dict:
         }, mark.marked_verses)),
         "marked": mark.marked,
     }
+
+
+def serialize_mark_record(mark: Mark) -> dict:
+    """Serializes a mark to be exported, without the IDs of this instance"""
+    return {
+        "color": mark.color,
+        "note": mark.note,
+        "marked": mark.marked,
+        "markedVerses": list(map(lambda marked_verse: {
+            "verse": {
+                "versionId": marked_verse.verse.version.get_internal_id(),
+                "bookId": marked_verse.verse.book.value.id,
+                "chapterId": marked_verse.verse.chapter_id,
+                "verseNumber": marked_verse.verse.verse_number,
+            },
+            "visible": marked_verse.visibility,
+        }, mark.marked_verses)),
+    }
+
+
+def build_mark_records(marks: Iterable[Mark]) -> Iterator[str]:
+    """Serializes marks as NDJSON lines, one by one"""
+    for mark in marks:
+        yield json.dumps(serialize_mark_record(mark), ensure_ascii=False) + "\n"
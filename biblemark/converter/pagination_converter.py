@@ -1,14 +1,76 @@
+import base64
+import binascii
+from datetime import datetime
 from math import ceil
-from typing import List
+from typing import List, Optional, Tuple
 
+from biblemark.exceptions.mark_http_exceptions import InvalidPageCursor, InvalidPageSize
+
+DEFAULT_PAGE_SIZE = 30
+PAGE_SIZES = [1, 5, 10, 30, 50, 100]
+
+
+def validate_page_size(page_size):
+    if page_size not in PAGE_SIZES:
+        raise InvalidPageSize(f"Invalid page size {page_size}, expected one of {PAGE_SIZES}")
+
+
+def parse_page_args(args) -> dict:
+    """
+    Reads the pagination parameters of a request.
+
+    Pages are requested after or before a cursor, or by number for compatibility.
+    """
+    page_size = args.get("size", default=DEFAULT_PAGE_SIZE, type=int)
+    validate_page_size(page_size)
 
-def build_paginated_response(size: int, total_elements: int, number: int, content: List[dict]) -> dict:
+    return {
+        "size": page_size,
+        "number": max(1, args.get("page", default=1, type=int)) - 1,
+        "after": decode_cursor(args["after"]) if args.get("after") else None,
+        "before": decode_cursor(args["before"]) if args.get("before") else None,
+    }
+
+
+def encode_cursor(item: dict) -> str:
+    """Encodes the (marked, id) position of a serialized mark"""
+    encoded = base64.urlsafe_b64encode(f"{item['marked']}|{item['id']}".encode("utf8")).decode("ascii")
+    return encoded.rstrip("=")  # safe in URLs as is
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        marked, entity_id = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf8").rsplit("|", 1)
+        datetime.fromisoformat(marked)
+        return marked, int(entity_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidPageCursor(f"Invalid page cursor {cursor}")
+
+
+def build_paginated_response(size: int, total_elements: int, number: int, content: List[dict],
+                             previous_cursor: Optional[str] = None, next_cursor: Optional[str] = None) -> dict:
     return {
         "page": {
             "size": size,
             "totalElements": total_elements,
             "totalPages": max(1, ceil(total_elements / size)),
             "number": number,
+            "previous": previous_cursor,
+            "next": next_cursor,
         },
         "content": content
-    }
\ No newline at end of file
+    }
+
+
+def build_cursor_paginated_response(size: int, total_elements: int, number: int, content: List[dict],
+                                    has_previous: bool, has_next: bool) -> dict:
+    """Builds a page with the cursors of its first and last items, to request the pages around it"""
+    return build_paginated_response(
+        size,
+        total_elements,
+        number,
+        content,
+        previous_cursor=encode_cursor(content[0]) if has_previous and content else None,
+        next_cursor=encode_cursor(content[-1]) if has_next and content else None,
+    )
@@ -0,0 +1,14 @@
+from typing import Optional
+
+from biblemark.model.user import User
+
+
+def serialize_user(user: Optional[User]) -> Optional[dict]:
+    if user is None:
+        return None
+    return {
+        "id": user.entity_id,
+        "username": user.username,
+        "name": user.name,
+        "created": user.created,
+    }
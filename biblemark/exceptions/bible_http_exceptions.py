@@ -13,6 +13,22 @@ class ChapterNotFound(HTTPException):
     code = 404
 
 
+class UpstreamResourceNotFound(HTTPException):
+    code = 404
+
+
+class UpstreamUnavailable(HTTPException):
+    code = 503
+
+
+class UpstreamQuotaExceeded(HTTPException):
+    code = 429
+
+
+class InvalidChapterFormat(HTTPException):
+    code = 400
+
+
 class InvalidBibleReference(HTTPException):
     code = 400
 
@@ -7,3 +7,15 @@ class MarkNotFound(HTTPException):
 
 class InvalidMarkedVerse(HTTPException):
     code = 400
+
+
+class InvalidPageCursor(HTTPException):
+    code = 400
+
+
+class InvalidPageSize(HTTPException):
+    code = 400
+
+
+class InvalidMarkOperation(HTTPException):
+    code = 400
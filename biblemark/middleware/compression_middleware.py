@@ -0,0 +1,86 @@
+import gzip
+
+from flask import Blueprint, current_app, request
+
+from biblemark.config.cache import get_derived_cache
+
+try:
+    import brotli
+except ImportError:  # optional, responses are gzipped only
+    brotli = None
+
+bp = Blueprint("compression", __name__)
+
+cache = get_derived_cache()
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html"}
+
+
+@bp.after_app_request
+def compress(response):
+    """
+    Compresses JSON and HTML responses with the best encoding accepted by the client.
+
+    Bodies of responses with an ETag are compressed once per encoding and kept in the cache.
+    """
+    response.vary.add("Accept-Encoding")
+
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < current_app.config["COMPRESSION_MIN_SIZE"]:
+        return response
+
+    etag, _ = response.get_etag()
+
+    if etag is not None:
+        key = f"compressed:{etag}:{encoding}"
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = compress_data(data, encoding)
+            cache.set(key, compressed)
+        # the compressed representation is semantically equivalent, but not byte-for-byte
+        response.set_etag(etag, weak=True)
+    else:
+        compressed = compress_data(data, encoding)
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+
+    return response
+
+
+def is_compressed(mimetype: str, size: int) -> bool:
+    """Tells if a 200 response of the current request would be compressed, so its ETag would be weak"""
+    return (
+        mimetype in COMPRESSIBLE_MIMETYPES
+        and size >= current_app.config["COMPRESSION_MIN_SIZE"]
+        and negotiate_encoding() is not None
+    )
+
+
+def negotiate_encoding():
+    accepted = request.accept_encodings
+
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def compress_data(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=current_app.config["COMPRESSION_BROTLI_QUALITY"])
+    return gzip.compress(data, compresslevel=current_app.config["COMPRESSION_GZIP_LEVEL"])
@@ -0,0 +1,67 @@
+import functools
+import hashlib
+
+from flask import current_app, request
+
+from biblemark.config.cache import get_derived_cache, get_cache_generation
+from biblemark.config.versions import get_version_registry
+from biblemark.middleware.compression_middleware import is_compressed
+
+cache = get_derived_cache()
+
+
+def conditional(max_age_config: str = "HTTP_CACHE_MAX_AGE"):
+    """
+    Makes a public view conditionally cacheable, with content-derived ETags and Cache-Control.
+
+    The ETag of each URL is kept in the cache, so a matching If-None-Match is answered
+    with 304 without calling the view. A 304 carries the ETag as the 200 would, weak if compressed.
+    ETags are dropped when the cache is cleared or the versions are reloaded, as a version
+    may have been disabled or remapped since.
+
+    :param max_age_config: app config key of the Cache-Control max-age, in seconds
+    """
+    def decorator(view):
+
+        @functools.wraps(view)
+        def wrapped_view(**kwargs):
+            key = get_etag_key()
+            max_age = current_app.config[max_age_config]
+
+            cached = cache.get(key)  # (etag, mimetype, size) of the uncompressed representation
+            # weak comparison, as compressed representations carry the weak ETag
+            if isinstance(cached, tuple) and request.if_none_match.contains_weak(cached[0]):
+                etag, mimetype, size = cached
+                response = current_app.response_class(status=304)
+                set_cache_headers(response, etag, max_age, weak=is_compressed(mimetype, size))
+                return response
+
+            response = current_app.make_response(view(**kwargs))
+            if response.status_code != 200:
+                return response
+
+            data = response.get_data()
+            mimetype = response.mimetype
+            etag = hashlib.sha256(data).hexdigest()[:32]
+            cache.set(key, (etag, mimetype, len(data)))
+            set_cache_headers(response, etag, max_age)
+
+            response = response.make_conditional(request)
+            if response.status_code == 304 and is_compressed(mimetype, len(data)):
+                response.set_etag(etag, weak=True)  # not compressed by the middleware, having no body
+
+            return response
+
+        return wrapped_view
+
+    return decorator
+
+
+def get_etag_key() -> str:
+    return f"etag:{get_cache_generation()}:{get_version_registry().generation}:{request.full_path}"
+
+
+def set_cache_headers(response, etag: str, max_age: int, weak: bool = False):
+    response.set_etag(etag, weak=weak)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
@@ -128,8 +128,11 @@ class BibleBook(Enum):
         return self.value.id
 
 
+BOOKS_BY_ID = {member.value.id: member for member in BibleBook}
+
+
 def parse_book(book_id: str) -> BibleBook:
-    for member in BibleBook:
-        if member.value.id == book_id:
-            return member
-    raise InvalidBook(f"Book {book_id} is not supported")
+    book = BOOKS_BY_ID.get(book_id)
+    if book is None:
+        raise InvalidBook(f"Book {book_id} is not supported")
+    return book
@@ -0,0 +1,39 @@
+from typing import Optional
+
+
+class BibleNavigationIndex:
+    """Books and chapters of a version, resolving chapter numbers to external chapter IDs"""
+
+    def __init__(self, books: [dict], chapters: {str: [dict]}):
+        """
+        :param books: books of the version, as listed by the external API
+        :param chapters: chapters of each book by book ID, as listed by the external API
+        """
+        self.books = books
+        self.chapters = chapters
+        self.books_by_id = {book["id"]: book for book in books}
+        self.chapter_ids = {
+            (book_id, chapter["number"]): chapter["id"]
+            for book_id, book_chapters in chapters.items()
+            for chapter in book_chapters
+        }
+
+    @classmethod
+    def from_books_with_chapters(cls, books: [dict]):
+        """Builds the index from books listed with their chapters included"""
+        return cls(
+            books=[{key: value for key, value in book.items() if key != "chapters"} for book in books],
+            chapters={book["id"]: book.get("chapters", []) for book in books},
+        )
+
+    def get_books(self) -> [dict]:
+        return self.books
+
+    def get_book(self, book_id: str) -> Optional[dict]:
+        return self.books_by_id.get(book_id)
+
+    def get_chapters(self, book_id: str) -> Optional[list]:
+        return self.chapters.get(book_id)
+
+    def resolve_chapter_id(self, book_id: str, chapter_number: str) -> Optional[str]:
+        return self.chapter_ids.get((book_id, chapter_number))
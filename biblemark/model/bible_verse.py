@@ -24,6 +24,16 @@ class BibleVerse:
         self.chapter_id = chapter_id
         self.verse_number = verse_number
 
+    @classmethod
+    def restore(cls, version: Version, book: BibleBook, chapter_id: str, verse_number: int) -> BibleVerse:
+        """Rebuilds a verse stored in the database, skipping the validation of new verses"""
+        verse = cls.__new__(cls)
+        verse.version = version
+        verse.book = book
+        verse.chapter_id = chapter_id
+        verse.verse_number = verse_number
+        return verse
+
     def to_verse_id(self) -> str:
         return f"{self.book.get_id()}.{self.chapter_id}.{self.verse_number}"
 
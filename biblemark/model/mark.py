@@ -7,7 +7,7 @@ from biblemark.model.user import User
 
 
 class Mark:
-    COLOR_CODE_FORMAT = r"^#?[0-9a-f]{6}$"
+    COLOR_CODE_FORMAT = r"#[0-9a-f]{6}"  # rendered in style attributes, so nothing else is accepted
     MAX_NOTE_LENGTH = 1024
 
     def __init__(self,
@@ -24,7 +24,7 @@ class Mark:
             raise ValueError("Invalid user for mark")
 
         if color is not None:
-            if not bool(re.match(self.COLOR_CODE_FORMAT, color, re.IGNORECASE)):
+            if not isinstance(color, str) or not re.fullmatch(self.COLOR_CODE_FORMAT, color, re.IGNORECASE):
                 raise ValueError("Invalid color for mark")
 
         if note is not None:
@@ -42,6 +42,18 @@ class Mark:
         self.marked_verses = marked_verses
         self.marked = marked
 
+    @classmethod
+    def restore(cls, user: User, color: str, note: str, marked_verses: List[MarkedVerse], entity_id, marked):
+        """Rebuilds a mark stored in the database, skipping the validation of new marks"""
+        mark = cls.__new__(cls)
+        mark.entity_id = entity_id
+        mark.user = user
+        mark.color = color
+        mark.note = note
+        mark.marked_verses = marked_verses
+        mark.marked = marked
+        return mark
+
     def add_marked_verse(self, marked_verse: MarkedVerse) -> None:
         self.marked_verses.append(marked_verse)
 
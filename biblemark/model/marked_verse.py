@@ -17,6 +17,15 @@ class MarkedVerse:
     def factory(version: Version, book_id, chapter_id, verse_number, visibility=True, entity_id=None):
         return MarkedVerse(BibleVerse(version, book_id, chapter_id, verse_number), visibility, entity_id)
 
+    @classmethod
+    def restore(cls, verse: BibleVerse, visibility: bool, entity_id):
+        """Rebuilds a marked verse stored in the database, skipping the validation of new ones"""
+        marked_verse = cls.__new__(cls)
+        marked_verse.entity_id = entity_id
+        marked_verse.verse = verse
+        marked_verse.visibility = visibility
+        return marked_verse
+
     def __str__(self) -> str:
         return f"MarkedVerse(id={self.entity_id}, verse={self.verse}, visibility={self.visibility})"
 
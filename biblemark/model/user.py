@@ -17,6 +17,17 @@ class User:
         self.entity_id = entity_id
         self.created = created
 
+    @classmethod
+    def restore(cls, username, name, password, entity_id, created=None):
+        """Rebuilds a user stored in the database, skipping the validation of new users"""
+        user = cls.__new__(cls)
+        user.username = username
+        user.name = name
+        user.password = password
+        user.entity_id = entity_id
+        user.created = created
+        return user
+
     def __str__(self) -> str:
         return f"User(id={self.entity_id}, username={self.username}, name={self.name}, created={self.created})"
 
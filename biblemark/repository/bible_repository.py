@@ -5,23 +5,21 @@ from biblemark.config.db import get_db
 from biblemark.model.bible_version import Version
 
 
-def fetch_supported_versions() -> [Optional[Version]]:
+def fetch_all_versions() -> List[Version]:
     rows = get_db().execute(
         "SELECT *"
         "  FROM version v"
-        " WHERE v.disabled IS FALSE"
         " ORDER BY v.internal_id",
     ).fetchall()
 
     return convert_version_rows(rows)
 
 
-def fetch_supported_version(internal_id) -> Optional[Version]:
+def fetch_version_by_id(internal_id: str) -> Optional[Version]:
     row = get_db().execute(
         "SELECT *"
         "  FROM version v"
-        " WHERE v.internal_id = ?"
-        "   AND v.disabled IS FALSE ",
+        " WHERE v.internal_id = ?",
         (internal_id,)
     ).fetchone()
 
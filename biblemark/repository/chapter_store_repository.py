@@ -0,0 +1,161 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from time import monotonic
+from typing import Optional
+
+from biblemark.config.store import get_store_dir, get_store_check_interval
+
+# header: magic, index offset, index length
+HEADER_FORMAT = "<8sQQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+MAGIC = b"BMPACK01"
+
+stores = {}  # internal version ID -> (ChapterStore or None, next check time, file mtime)
+stores_lock = threading.Lock()
+
+
+class ChapterStore:
+    """
+    Read-only view over a packed file of a version's books, chapters and chapter contents.
+
+    The file is memory-mapped once per process, so chapter reads are plain slices
+    served from the page cache, which is shared by every worker process.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self.mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, index_offset, index_length = struct.unpack_from(HEADER_FORMAT, self.mm, 0)
+        if magic != MAGIC:
+            self.mm.close()
+            raise ValueError(f"Invalid chapter store file {path}")
+
+        index = json.loads(self.mm[index_offset:index_offset + index_length])
+
+        self.path = path
+        self.external_id = index["externalId"]
+        self.books = index["books"]
+        self.chapters = index["chapters"]
+        self.contents = index["contents"]
+
+    def get_books(self) -> dict:
+        return {"data": self.books}
+
+    def get_chapters(self, book_id: str) -> Optional[dict]:
+        chapters = self.chapters.get(book_id)
+        return {"data": chapters} if chapters is not None else None
+
+    def get_chapter(self, chapter_id: str) -> Optional[dict]:
+        location = self.contents.get(chapter_id)
+        if location is None:
+            return None
+        offset, length = location
+        return {"data": json.loads(self.mm[offset:offset + length])}
+
+    def close(self):
+        self.mm.close()
+
+
+def get_store_path(internal_id: str) -> str:
+    return os.path.join(get_store_dir(), f"{internal_id}.pack")
+
+
+def get_journal_path(internal_id: str) -> str:
+    return os.path.join(get_store_dir(), f"{internal_id}.pack.partial")
+
+
+def fetch_chapter_store(internal_id: str) -> Optional[ChapterStore]:
+    """Returns the packed store of a version, if ingested, re-checking the file at most once per interval"""
+    entry = stores.get(internal_id)
+    now = monotonic()
+
+    if entry is not None and now < entry[1]:
+        return entry[0]
+
+    with stores_lock:
+        store, _, mtime = stores.get(internal_id, (None, 0, None))
+        path = get_store_path(internal_id)
+
+        try:
+            current_mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            current_mtime = None
+
+        if current_mtime != mtime:
+            # replaced files keep their inode alive for readers of the previous mapping
+            store = ChapterStore(path) if current_mtime is not None else None
+
+        stores[internal_id] = (store, now + get_store_check_interval(), current_mtime)
+
+        return store
+
+
+def load_journal(internal_id: str) -> (Optional[dict], dict):
+    """Loads the navigation and chapter contents already crawled for a version"""
+    navigation = None
+    contents = {}
+
+    try:
+        with open(get_journal_path(internal_id), "r", encoding="utf8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn write of an interrupted crawl, refetched on resume
+
+                if "navigation" in record:
+                    navigation = record["navigation"]
+                else:
+                    contents[record["chapterId"]] = record["data"]
+    except FileNotFoundError:
+        pass
+
+    return navigation, contents
+
+
+def append_journal(internal_id: str, record: dict):
+    os.makedirs(get_store_dir(), exist_ok=True)
+    with open(get_journal_path(internal_id), "a", encoding="utf8") as file:
+        file.write(json.dumps(record) + "\n")
+
+
+def save_chapter_store(internal_id: str, external_id: str, navigation: dict, contents: dict):
+    """Writes the packed file of a version atomically, and removes its crawl journal"""
+    path = get_store_path(internal_id)
+    tmp = f"{path}.tmp"
+    offsets = {}
+
+    with open(tmp, "wb") as file:
+        file.write(b"\0" * HEADER_SIZE)
+        offset = HEADER_SIZE
+
+        for chapter_id, data in contents.items():
+            blob = json.dumps(data, separators=(",", ":")).encode("utf8")
+            file.write(blob)
+            offsets[chapter_id] = [offset, len(blob)]
+            offset += len(blob)
+
+        index = json.dumps({
+            "externalId": external_id,
+            "books": navigation["books"],
+            "chapters": navigation["chapters"],
+            "contents": offsets,
+        }, separators=(",", ":")).encode("utf8")
+        file.write(index)
+
+        file.seek(0)
+        file.write(struct.pack(HEADER_FORMAT, MAGIC, offset, len(index)))
+
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(tmp, path)
+
+    try:
+        os.remove(get_journal_path(internal_id))
+    except FileNotFoundError:
+        pass
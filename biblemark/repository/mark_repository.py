@@ -1,43 +1,128 @@
 from datetime import datetime
 from sqlite3 import Row
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
-from biblemark.config.db import get_db
+from biblemark.config.db import get_db, commit_db, transaction
+from biblemark.config.versions import get_version_registry
+from biblemark.model.bible_verse import BibleVerse
 from biblemark.model.bible_version import Version
 from biblemark.model.mark import Mark
 from biblemark.model.marked_verse import MarkedVerse
 from biblemark.model.user import User
 from biblemark.model.bible_book import parse_book
+from biblemark.repository.bible_repository import fetch_version_by_id
+
+# columns decoded by convert_rows, in order
+MARK_COLUMNS = ("m.id, m.user_id, m.color, m.note, m.marked,"
+                " mv.id, mv.version_id, mv.book_id, mv.chapter_id, mv.verse_number, mv.visibility")
+MAX_PARAMETERS = 900  # bound per statement, within the SQLite default limit of 999 on older builds
 
 
 def count_highlights_by_user(user: User) -> int:
-    return get_db().execute(
-        "SELECT count(*)"
-        "  FROM mark m"
-        " WHERE m.user_id = ?"
-        "   AND m.color IS NOT NULL ",
+    row = get_db().execute(
+        "SELECT c.highlights"
+        "  FROM mark_count c"
+        " WHERE c.user_id = ?",
         (user.entity_id,)
-    ).fetchone()[0]
+    ).fetchone()
+    return row[0] if row is not None else 0
 
 
 def count_notes_by_user(user: User) -> int:
+    row = get_db().execute(
+        "SELECT c.notes"
+        "  FROM mark_count c"
+        " WHERE c.user_id = ?",
+        (user.entity_id,)
+    ).fetchone()
+    return row[0] if row is not None else 0
+
+
+def count_highlights_by_user_and_color(user: User) -> List[Row]:
     return get_db().execute(
-        "SELECT count(*)"
-        "  FROM mark m"
-        " WHERE m.user_id = ?"
-        "   AND m.note IS NOT NULL ",
+        "SELECT cc.color, cc.highlights"
+        "  FROM mark_color_count cc"
+        " WHERE cc.user_id = ?"
+        " ORDER BY cc.highlights DESC, cc.color",
         (user.entity_id,)
-    ).fetchone()[0]
+    ).fetchall()
+
+
+def reconcile_mark_counts() -> int:
+    """
+    Rebuilds the counters of marks kept by triggers, from the marks themselves.
+
+    :return: number of users whose counters differed from their marks
+    """
+    db = get_db()
+
+    with transaction():
+        differences = db.execute(
+            "WITH actual_count AS"
+            "     (SELECT user_id, count(color) AS highlights, count(note) AS notes"
+            "        FROM mark"
+            "       GROUP BY user_id"
+            "      HAVING highlights > 0 OR notes > 0),"
+            "     stored_count AS"
+            "     (SELECT user_id, highlights, notes"
+            "        FROM mark_count"
+            "       WHERE highlights != 0 OR notes != 0),"
+            "     actual_color_count AS"
+            "     (SELECT user_id, color, count(*) AS highlights"
+            "        FROM mark"
+            "       WHERE color IS NOT NULL"
+            "       GROUP BY user_id, color),"
+            "     differing_user AS"
+            "     (SELECT user_id FROM (SELECT * FROM actual_count EXCEPT SELECT * FROM stored_count)"
+            "       UNION"
+            "      SELECT user_id FROM (SELECT * FROM stored_count EXCEPT SELECT * FROM actual_count)"
+            "       UNION"
+            "      SELECT user_id FROM (SELECT * FROM actual_color_count EXCEPT SELECT * FROM mark_color_count)"
+            "       UNION"
+            "      SELECT user_id FROM (SELECT * FROM mark_color_count EXCEPT SELECT * FROM actual_color_count))"
+            "SELECT count(*)"
+            "  FROM differing_user"
+        ).fetchone()[0]
+
+        db.execute("DELETE FROM mark_count")
+        db.execute("DELETE FROM mark_color_count")
+        db.execute(
+            "INSERT INTO mark_count (user_id, highlights, notes)"
+            "SELECT user_id, count(color), count(note)"
+            "  FROM mark"
+            " GROUP BY user_id"
+        )
+        db.execute(
+            "INSERT INTO mark_color_count (user_id, color, highlights)"
+            "SELECT user_id, color, count(*)"
+            "  FROM mark"
+            " WHERE color IS NOT NULL"
+            " GROUP BY user_id, color"
+        )
+
+    return differences
+
+
+def fetch_most_marked_chapters(version_id: str, limit: int) -> List[Row]:
+    return get_db().execute(
+        "SELECT mv.book_id, mv.chapter_id, count(*) AS marks"
+        "  FROM marked_verse mv"
+        " WHERE mv.version_id = ?"
+        "   AND mv.visibility IS TRUE"
+        " GROUP BY mv.book_id, mv.chapter_id"
+        " ORDER BY marks DESC"
+        " LIMIT ?",
+        (version_id,
+         limit,)
+    ).fetchall()
 
 
 def fetch_mark_by_id(mark_id: str) -> Optional[Mark]:
     rows = get_db().execute(
-        "SELECT m.*, m.id as mark_id, mv.*, mv.id as marked_verse_id, v.*, u.*"
+        f"SELECT {MARK_COLUMNS}, u.username, u.display_name"
         "  FROM mark m"
         "  JOIN marked_verse mv"
         "    ON mv.mark_id = m.id"
-        "  JOIN version v"
-        "    ON v.internal_id = mv.version_id"
         "  JOIN user u"
         "    ON u.id = m.user_id"
         " WHERE m.id = ?",
@@ -49,75 +134,159 @@ def fetch_mark_by_id(mark_id: str) -> Optional[Mark]:
 
 def fetch_paginated_highlights_by_user(user: User, limit: int, offset: int) -> List[Mark]:
     rows = get_db().execute(
-        "SELECT m.*, m.id as mark_id, mv.*, mv.id as marked_verse_id, v.*, u.*"
+        f"SELECT {MARK_COLUMNS}"
         "  FROM mark m"
         "  JOIN marked_verse mv"
         "    ON mv.mark_id = m.id"
-        "  JOIN version v"
-        "    ON v.internal_id = mv.version_id"
-        "  JOIN user u"
-        "    ON u.id = m.user_id"
-        " WHERE u.id = ?"
+        " WHERE m.user_id = ?"
         "   AND m.color IS NOT NULL"
         "   AND m.id IN"
         "       (SELECT mark.id"
         "          FROM mark"
         "         WHERE mark.user_id = ?"
         "           AND mark.color IS NOT NULL"
-        "         ORDER BY mark.marked DESC"
+        "         ORDER BY mark.marked DESC, mark.id DESC"
         "         LIMIT ?"
         "        OFFSET ?)"
-        " ORDER BY m.marked DESC",
+        " ORDER BY m.marked DESC, m.id DESC",
         (user.entity_id,
          user.entity_id,
          limit,
          offset,)
     ).fetchall()
 
-    return convert_rows(rows)
+    return convert_rows(rows, user)
 
 
 def fetch_paginated_notes_by_user(user: User, limit: int, offset: int) -> List[Mark]:
     rows = get_db().execute(
-        "SELECT m.*, m.id as mark_id, mv.*, mv.id as marked_verse_id, v.*, u.*"
+        f"SELECT {MARK_COLUMNS}"
         "  FROM mark m"
         "  JOIN marked_verse mv"
         "    ON mv.mark_id = m.id"
-        "  JOIN version v"
-        "    ON v.internal_id = mv.version_id"
-        "  JOIN user u"
-        "    ON u.id = m.user_id"
-        " WHERE u.id = ?"
+        " WHERE m.user_id = ?"
         "   AND m.note IS NOT NULL"
-        "   AND mark_id IN"
+        "   AND m.id IN"
         "       (SELECT mark.id"
         "          FROM mark"
         "         WHERE mark.user_id = ?"
         "           AND mark.note IS NOT NULL"
-        "         ORDER BY mark.marked DESC"
+        "         ORDER BY mark.marked DESC, mark.id DESC"
         "         LIMIT ?"
         "        OFFSET ?)"
-        " ORDER BY m.marked DESC",
+        " ORDER BY m.marked DESC, m.id DESC",
         (user.entity_id,
          user.entity_id,
          limit,
          offset,)
     ).fetchall()
 
-    return convert_rows(rows)
+    return convert_rows(rows, user)
+
+
+def keyset_condition(after: Optional[Tuple[str, int]], before: Optional[Tuple[str, int]]) -> Tuple[str, tuple, str]:
+    """Returns the condition, parameters and order of marks following a cursor of (marked, id)"""
+    if before is not None:
+        return "AND (mark.marked, mark.id) > (?, ?)", before, "ASC"
+    if after is not None:
+        return "AND (mark.marked, mark.id) < (?, ?)", after, "DESC"
+    return "", (), "DESC"
+
+
+def fetch_highlights_page_by_user(user: User, limit: int, after: Optional[Tuple[str, int]] = None,
+                                  before: Optional[Tuple[str, int]] = None) -> List[Mark]:
+    """
+    Fetches the highlights right after or before a (marked, id) cursor, newest first.
+
+    Unlike an offset, the cursor is a position in the index, so deep pages are as fast as the first.
+    """
+    condition, cursor, order = keyset_condition(after, before)
+
+    rows = get_db().execute(
+        f"SELECT {MARK_COLUMNS}"
+        "  FROM mark m"
+        "  JOIN marked_verse mv"
+        "    ON mv.mark_id = m.id"
+        " WHERE m.user_id = ?"
+        "   AND m.color IS NOT NULL"
+        "   AND m.id IN"
+        "       (SELECT mark.id"
+        "          FROM mark"
+        "         WHERE mark.user_id = ?"
+        "           AND mark.color IS NOT NULL"
+        f"          {condition}"
+        f"        ORDER BY mark.marked {order}, mark.id {order}"
+        "         LIMIT ?)"
+        " ORDER BY m.marked DESC, m.id DESC",
+        (user.entity_id,
+         user.entity_id,
+         *cursor,
+         limit,)
+    ).fetchall()
+
+    return convert_rows(rows, user)
+
+
+def fetch_notes_page_by_user(user: User, limit: int, after: Optional[Tuple[str, int]] = None,
+                             before: Optional[Tuple[str, int]] = None) -> List[Mark]:
+    """Fetches the notes right after or before a (marked, id) cursor, newest first"""
+    condition, cursor, order = keyset_condition(after, before)
+
+    rows = get_db().execute(
+        f"SELECT {MARK_COLUMNS}"
+        "  FROM mark m"
+        "  JOIN marked_verse mv"
+        "    ON mv.mark_id = m.id"
+        " WHERE m.user_id = ?"
+        "   AND m.note IS NOT NULL"
+        "   AND m.id IN"
+        "       (SELECT mark.id"
+        "          FROM mark"
+        "         WHERE mark.user_id = ?"
+        "           AND mark.note IS NOT NULL"
+        f"          {condition}"
+        f"        ORDER BY mark.marked {order}, mark.id {order}"
+        "         LIMIT ?)"
+        " ORDER BY m.marked DESC, m.id DESC",
+        (user.entity_id,
+         user.entity_id,
+         *cursor,
+         limit,)
+    ).fetchall()
+
+    return convert_rows(rows, user)
+
+
+def fetch_marks_by_user_after_id(user: User, after_id: int, limit: int) -> List[Mark]:
+    """Fetches marks of a user by ID order, with all their marked verses, hidden ones included"""
+    rows = get_db().execute(
+        f"SELECT {MARK_COLUMNS}"
+        "  FROM mark m"
+        "  JOIN marked_verse mv"
+        "    ON mv.mark_id = m.id"
+        " WHERE m.id IN"
+        "       (SELECT mark.id"
+        "          FROM mark"
+        "         WHERE mark.user_id = ?"
+        "           AND mark.id > ?"
+        "         ORDER BY mark.id"
+        "         LIMIT ?)"
+        " ORDER BY m.id, mv.id",
+        (user.entity_id,
+         after_id,
+         limit,)
+    ).fetchall()
+
+    return convert_rows(rows, user)
 
 
 def fetch_visible_marks_by_user_and_chapter(user: User, version_id: str, book_id: str, chapter_id: str) -> List[Mark]:
     rows = get_db().execute(
-        "SELECT m.*, m.id as mark_id, mv.*, mv.id as marked_verse_id, v.*, u.*"
+        f"SELECT {MARK_COLUMNS}"
         "  FROM mark m"
         "  JOIN marked_verse mv"
         "    ON mv.mark_id = m.id"
-        "  JOIN version v"
-        "    ON v.internal_id = mv.version_id"
-        "  JOIN user u"
-        "    ON u.id = m.user_id"
-        " WHERE u.id = ?"
+        " WHERE m.user_id = ?"
         "   AND mv.version_id = ?"
         "   AND mv.book_id = ?"
         "   AND mv.chapter_id = ?"
@@ -128,7 +297,7 @@ def fetch_visible_marks_by_user_and_chapter(user: User, version_id: str, book_id
          chapter_id,)
     ).fetchall()
 
-    return convert_rows(rows)
+    return convert_rows(rows, user)
 
 
 def save_mark(mark: Mark) -> Mark:
@@ -154,22 +323,73 @@ def save_mark(mark: Mark) -> Mark:
              mark.marked),
         ).lastrowid
 
+        db.executemany(
+            "INSERT INTO marked_verse (version_id, book_id, chapter_id, verse_number, visibility, mark_id) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(marked_verse.verse.version.get_internal_id(),
+              marked_verse.verse.book.get_id(),
+              marked_verse.verse.chapter_id,
+              marked_verse.verse.verse_number,
+              marked_verse.visibility,
+              mark.entity_id)
+             for marked_verse in mark.marked_verses],
+        )
+
+        # IDs of the bulk insert, matched by the verse, unique within a mark
+        ids = {
+            (row["version_id"], row["book_id"], row["chapter_id"], row["verse_number"]): row["id"]
+            for row in db.execute(
+                "SELECT id, version_id, book_id, chapter_id, verse_number"
+                "  FROM marked_verse"
+                " WHERE mark_id = ?",
+                (mark.entity_id,)
+            )
+        }
         for marked_verse in mark.marked_verses:
-            marked_verse.entity_id = db.execute(
-                "INSERT INTO marked_verse (version_id, book_id, chapter_id, verse_number, visibility, mark_id) "
-                "VALUES (?, ?, ?, ?, ?, ?)",
-                (marked_verse.verse.version.get_internal_id(),
-                 marked_verse.verse.book.get_id(),
-                 marked_verse.verse.chapter_id,
-                 marked_verse.verse.verse_number,
-                 marked_verse.visibility, mark.entity_id),
-            ).lastrowid
-
-    db.commit()
+            marked_verse.entity_id = ids[(marked_verse.verse.version.get_internal_id(),
+                                          marked_verse.verse.book.get_id(),
+                                          marked_verse.verse.chapter_id,
+                                          int(marked_verse.verse.verse_number))]
+
+    commit_db()
 
     return mark
 
 
+def insert_marks(marks: List[Mark]):
+    """Inserts new marks as they are, keeping their date and the visibility of their verses"""
+    db = get_db()
+    marked_verse_rows = []
+
+    for mark in marks:
+        mark.entity_id = db.execute(
+            "INSERT INTO mark (user_id, color, note, marked) "
+            "VALUES (?, ?, ?, ?)",
+            (mark.user.entity_id,
+             mark.color,
+             mark.note,
+             mark.marked),
+        ).lastrowid
+
+        marked_verse_rows.extend(
+            (marked_verse.verse.version.get_internal_id(),
+             marked_verse.verse.book.get_id(),
+             marked_verse.verse.chapter_id,
+             marked_verse.verse.verse_number,
+             marked_verse.visibility,
+             mark.entity_id)
+            for marked_verse in mark.marked_verses
+        )
+
+    db.executemany(
+        "INSERT INTO marked_verse (version_id, book_id, chapter_id, verse_number, visibility, mark_id) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        marked_verse_rows,
+    )
+
+    commit_db()
+
+
 def delete_mark_by_id(mark_id: str):
     db = get_db()
 
@@ -180,80 +400,117 @@ def delete_mark_by_id(mark_id: str):
         (mark_id,)
     )
 
-    db.commit()
+    commit_db()
 
 
-def soft_delete_marked_verses_by_ids(marked_verse_ids: List[str]):
+def soft_delete_marked_verses_by_ids(user: User, marked_verse_ids: List[int]):
+    """Hides the given verses of the highlights of a user, ignoring verses of other users"""
     db = get_db()
 
-    db.execute(
-        "UPDATE marked_verse"
-        "   SET visibility = FALSE"
-        " WHERE id IN (?)",
-        (", ".join(marked_verse_ids),)
-    )
+    for start in range(0, len(marked_verse_ids), MAX_PARAMETERS):
+        batch = marked_verse_ids[start:start + MAX_PARAMETERS]
+        db.execute(
+            "UPDATE marked_verse"
+            "   SET visibility = FALSE"
+            f" WHERE id IN ({', '.join('?' * len(batch))})"
+            "   AND EXISTS"
+            "       (SELECT 1"
+            "          FROM mark"
+            "         WHERE mark.id = marked_verse.mark_id"
+            "           AND mark.user_id = ?"
+            "           AND mark.color IS NOT NULL)",
+            (*batch,
+             user.entity_id,)
+        )
 
-    db.commit()
+    commit_db()
 
 
-def soft_delete_all_highlights_at_verses(marked_verses: List[MarkedVerse]):
+def soft_delete_all_highlights_at_verses(user: User, marked_verses: List[MarkedVerse]):
+    """
+    Hides the highlights of a user at the given verses, before highlighting them again.
+
+    The verses are joined as a VALUES list, so a whole selection takes a single statement
+    per batch instead of one per verse.
+    """
     db = get_db()
+    verses_per_batch = MAX_PARAMETERS // 4
 
-    for marked_verse in marked_verses:
+    for start in range(0, len(marked_verses), verses_per_batch):
+        batch = marked_verses[start:start + verses_per_batch]
         db.execute(
+            "WITH selected (version_id, book_id, chapter_id, verse_number) AS"
+            f"     (VALUES {', '.join(['(?, ?, ?, ?)'] * len(batch))})"
             "UPDATE marked_verse"
             "   SET visibility = FALSE"
-            " WHERE version_id = ?"
-            "   AND book_id = ?"
-            "   AND chapter_id = ?"
-            "   AND verse_number = ?"
-            "   AND mark_id IN"
-            "       (SELECT id"
+            " WHERE visibility IS TRUE"
+            "   AND (version_id, book_id, chapter_id, verse_number) IN"
+            "       (SELECT version_id, book_id, chapter_id, verse_number"
+            "          FROM selected)"
+            "   AND EXISTS"
+            "       (SELECT 1"
             "          FROM mark"
-            "         WHERE color IS NOT NULL)",
-            (marked_verse.verse.version.get_internal_id(),
-             marked_verse.verse.book.get_id(),
-             marked_verse.verse.chapter_id,
-             marked_verse.verse.verse_number,)
+            "         WHERE mark.id = marked_verse.mark_id"
+            "           AND mark.user_id = ?"
+            "           AND mark.color IS NOT NULL)",
+            (*(value
+               for marked_verse in batch
+               for value in (marked_verse.verse.version.get_internal_id(),
+                             marked_verse.verse.book.get_id(),
+                             marked_verse.verse.chapter_id,
+                             marked_verse.verse.verse_number)),
+             user.entity_id,)
         )
 
-    db.commit()
+    commit_db()
+
+
+def convert_rows(rows: List[Row], user: Optional[User] = None) -> List[Mark]:
+    """
+    Builds the marks of rows selected as MARK_COLUMNS, grouping their marked verses.
 
+    Rows are trusted as stored, so the models are restored without validation,
+    and each version and user is built once per result set.
 
-def convert_rows(rows: List[Row]) -> List[Mark]:
+    :param user: owner of every mark, otherwise read from the username and display name following the columns
+    """
     marks = {}
+    versions = {}
+    users = {}
 
-    for row in rows:
-        marked_verse = MarkedVerse.factory(
-            entity_id=row["marked_verse_id"],
-            version=Version(
-                row["internal_id"],
-                row["external_id"],
-                row["lang"],
-                row["name"],
-                bool(row["disabled"])
-            ),
-            book_id=parse_book(row["book_id"]),
-            chapter_id=row["chapter_id"],
-            verse_number=row["verse_number"],
-            visibility=bool(row["visibility"]),
+    if user is not None:
+        users[user.entity_id] = User.restore(
+            user.username, user.name, None, user.entity_id  # do not expose password hash
         )
 
-        if row["mark_id"] in marks:
-            marks[row["mark_id"]].add_marked_verse(marked_verse)
-        else:
-            marks[row["mark_id"]] = Mark(
-                entity_id=row["mark_id"],
-                user=User(
-                    entity_id=row["user_id"],
-                    name=row["display_name"],
-                    username=row["username"],
-                    password=None  # do not expose password hash
-                ),
-                color=row["color"],
-                note=row["note"],
-                marked_verses=[marked_verse],
-                marked=row["marked"]
-            )
+    for (mark_id, user_id, color, note, marked,
+         marked_verse_id, version_id, book_id, chapter_id, verse_number, visibility, *owner) in rows:
+        version = versions.get(version_id)
+        if version is None:
+            version = versions[version_id] = load_version(version_id)
+
+        marked_verse = MarkedVerse.restore(
+            BibleVerse.restore(version, parse_book(book_id), chapter_id, verse_number),
+            bool(visibility),
+            marked_verse_id,
+        )
+
+        mark = marks.get(mark_id)
+        if mark is not None:
+            mark.add_marked_verse(marked_verse)
+            continue
+
+        mark_user = users.get(user_id)
+        if mark_user is None:
+            mark_user = users[user_id] = User.restore(owner[0], owner[1], None, user_id)
+
+        marks[mark_id] = Mark.restore(mark_user, color, note, [marked_verse], mark_id, marked)
 
     return list(marks.values())
+
+
+def load_version(version_id: str) -> Version:
+    version = get_version_registry().get(version_id)
+    if version is None:
+        version = fetch_version_by_id(version_id)  # added after the registry was loaded
+    return version
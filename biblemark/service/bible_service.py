@@ -1,17 +1,24 @@
 from biblemark.exceptions.bible_http_exceptions import VersionNotFound, BookNotFound, ChapterNotFound
 from biblemark.model.bible_version import Version
-from biblemark.repository.bible_repository import fetch_supported_versions, fetch_supported_version
-from biblemark.service.external_bible_api_service import fetch_books, fetch_chapters, fetch_chapter
-from biblemark.utils.helpers import associate_by
+from biblemark.config.cache import get_cache, get_derived_cache
+from biblemark.config.versions import get_version_registry
+from biblemark.repository.chapter_store_repository import fetch_chapter_store
+from biblemark.service.external_bible_api_service import fetch_chapter
+from biblemark.service.navigation_service import get_navigation_index
+from biblemark.utils.request_scheduler import Priority
+from biblemark.utils.verse_parser import split_chapter_verses
+
+cache = get_cache()
+derived_cache = get_derived_cache()
 
 
 def get_versions() -> [dict]:
-    supported_versions = fetch_supported_versions()
+    supported_versions = get_version_registry().supported
     return list({"id": version.get_internal_id(), "name": version.name} for version in supported_versions)
 
 
 def get_version(version_id) -> Version:
-    result = fetch_supported_version(version_id)
+    result = get_version_registry().get_supported(version_id)
     if result is None:
         raise VersionNotFound(f"Version {version_id} not found")
     return result
@@ -19,32 +26,93 @@ def get_version(version_id) -> Version:
 
 def get_books(version_id) -> [dict]:
     version = get_version(version_id)
-    books = fetch_books(version.external_id)["data"]
+    books = get_navigation_index(version).get_books()
     return list({"id": book["id"], "name": book["name"]} for book in books)
 
 
 def get_chapters(version_id, book_id) -> [dict]:
     version = get_version(version_id)
-    chapters = fetch_chapters(version.external_id, book_id)["data"]
+    chapters = get_navigation_index(version).get_chapters(book_id.upper())
+
+    if chapters is None:
+        raise BookNotFound(f"Book {book_id} not found in version [{version.name}]")
+
     return list({"id": chapter["number"]} for chapter in chapters)
 
 
 def get_chapter_content(version_id, book_id, chapter_id) -> dict:
     version = get_version(version_id)
+    _, external_chapter_id = resolve_chapter(version, book_id, chapter_id)
+    return load_chapter(version, external_chapter_id)["data"]
+
+
+def get_chapter_verses(version_id, external_chapter_id) -> [dict]:
+    """Returns the verses of a chapter, with their number, plain text and offsets in the chapter HTML"""
+    return load_chapter_verses(get_version(version_id), external_chapter_id)["ordered"]
 
-    books = associate_by(fetch_books(version.external_id)["data"], "id")
-    book = books.get(book_id.upper())
+
+def resolve_chapter(version: Version, book_id, chapter_id) -> (dict, str):
+    """
+    Resolves a chapter from the navigation index of a version.
+
+    :return: book and external chapter ID
+    """
+    index = get_navigation_index(version)
+
+    book = index.get_book(book_id.upper())
 
     if book is None:
         raise BookNotFound(f"Book {book_id} not found in version [{version.name}]")
 
-    chapters = fetch_chapters(version.external_id, book["id"])["data"]
-    chapters = associate_by(chapters, "number")
-    chapter = chapters.get(str(chapter_id))
+    external_chapter_id = index.resolve_chapter_id(book["id"], str(chapter_id))
 
-    if chapter is None:
+    if external_chapter_id is None:
         raise ChapterNotFound(
             f"Chapter {book['name']} {chapter_id} not found in version {version.name}."
         )
 
-    return fetch_chapter(version.external_id, chapter["id"])["data"]
+    return book, external_chapter_id
+
+
+def load_chapter(version: Version, chapter_id: str, priority: Priority = Priority.INTERACTIVE) -> dict:
+    """Loads a chapter, caching its verses parsed as it's loaded, if not cached yet"""
+    chapter = load_chapter_source(version, chapter_id, priority)
+
+    if not derived_cache.has(get_chapter_verses_key(version, chapter_id)):
+        cache_chapter_verses(version, chapter_id, chapter)
+
+    return chapter
+
+
+def load_chapter_source(version: Version, chapter_id: str, priority: Priority = Priority.INTERACTIVE) -> dict:
+    store = fetch_chapter_store(version.get_internal_id())
+    if store is not None:
+        chapter = store.get_chapter(chapter_id)
+        if chapter is not None:
+            return chapter
+    return fetch_chapter(version.external_id, chapter_id, priority)
+
+
+def load_chapter_verses(version: Version, chapter_id: str, priority: Priority = Priority.INTERACTIVE) -> dict:
+    """
+    Loads a chapter parsed into verses, as cached when the chapter was loaded.
+
+    :return: dict with the "blocks" and "verses" for passage assembly, and the "ordered" verses
+    with text and offsets in the chapter HTML
+    """
+    verses = derived_cache.get(get_chapter_verses_key(version, chapter_id))
+
+    if verses is None:
+        verses = cache_chapter_verses(version, chapter_id, load_chapter_source(version, chapter_id, priority))
+
+    return verses
+
+
+def cache_chapter_verses(version: Version, chapter_id: str, chapter: dict) -> dict:
+    verses = split_chapter_verses(chapter["data"]["content"])
+    derived_cache.set(get_chapter_verses_key(version, chapter_id), verses)
+    return verses
+
+
+def get_chapter_verses_key(version: Version, chapter_id: str) -> str:
+    return f"chapter-verses:{version.external_id}:{chapter_id}"
@@ -0,0 +1,76 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
+
+from biblemark.repository.chapter_store_repository import load_journal, append_journal, save_chapter_store
+from biblemark.service.bible_service import get_version
+from biblemark.model.bible_navigation_index import BibleNavigationIndex
+from biblemark.service.external_bible_api_service import fetch_books_with_chapters, fetch_chapter
+from biblemark.utils.request_scheduler import Priority
+
+
+def pack_version(version_id: str, workers: int = 4, echo: Callable[[str], None] = print) -> bool:
+    """
+    Crawls every chapter of a version into its packed local store.
+
+    Crawled data is journaled as it arrives, so an interrupted or partially failed
+    crawl resumes where it stopped. The packed file is only written once complete.
+
+    :param version_id: internal version ID
+    :param workers: maximum concurrent upstream requests
+    :param echo: progress output
+    :return: True if the version was packed, False otherwise
+    """
+    version = get_version(version_id)
+    navigation, contents = load_journal(version.get_internal_id())
+
+    if contents:
+        echo(f"[{version_id}] Resuming with {len(contents)} chapter(s) already crawled")
+
+    if navigation is None:
+        books = fetch_books_with_chapters(version.external_id, Priority.BACKGROUND)["data"]
+        index = BibleNavigationIndex.from_books_with_chapters(books)
+        navigation = {"books": index.books, "chapters": index.chapters}
+        append_journal(version.get_internal_id(), {"navigation": navigation})
+
+    pending = [
+        chapter["id"]
+        for chapters in navigation["chapters"].values()
+        for chapter in chapters
+        if chapter["id"] not in contents
+    ]
+    total = len(contents) + len(pending)
+    failed = []
+    journal_lock = threading.Lock()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(fetch_chapter, version.external_id, chapter_id, Priority.BACKGROUND): chapter_id
+            for chapter_id in pending
+        }
+
+        for future in as_completed(futures):
+            chapter_id = futures[future]
+
+            try:
+                data = future.result()["data"]
+            except Exception as error:  # too broad exception clause is desired, retried on resume
+                failed.append(chapter_id)
+                echo(f"[{version_id}] Failed {chapter_id}: {error}")
+                continue
+
+            with journal_lock:
+                append_journal(version.get_internal_id(), {"chapterId": chapter_id, "data": data})
+                contents[chapter_id] = data
+
+            if len(contents) % 50 == 0:
+                echo(f"[{version_id}] {len(contents)}/{total} chapters")
+
+    if failed:
+        echo(f"[{version_id}] {len(failed)} chapter(s) failed, run again to resume")
+        return False
+
+    save_chapter_store(version.get_internal_id(), version.external_id, navigation, contents)
+    echo(f"[{version_id}] Packed {len(contents)} chapters")
+
+    return True
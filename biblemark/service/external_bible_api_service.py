@@ -1,9 +1,34 @@
-import requests
-
-from biblemark.config.cache import get_cache
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, time
+
+from requests import RequestException
+
+from biblemark.config.cache import get_cache, get_lock_dir, get_lock_timeout, get_jittered_timeout, \
+    get_stale_window, get_negative_timeout
+from biblemark.config.http import hedged_get, get_timeout, get_breaker, get_scheduler, get_max_wait
+from biblemark.exceptions.bible_http_exceptions import UpstreamResourceNotFound, UpstreamUnavailable, \
+    UpstreamQuotaExceeded
+from biblemark.utils.request_scheduler import Priority
+from biblemark.utils.single_flight import SingleFlight, file_lock
 from config import Config
 
 cache = get_cache()
+single_flight = SingleFlight()
+
+LATENCY_SMOOTHING = 0.2  # weight of the latest sample in the moving average
+upstream_health = {
+    "latency": 0.0,  # exponentially weighted moving average, in seconds
+    "rateLimitedAt": 0.0,  # epoch time of the latest 429 response
+}
+
+REFRESH_WORKERS = 2
+refresh_executor = None
+refreshing = set()  # URLs of stale entries being refreshed
+refreshing_lock = threading.Lock()
+
+counters = {"fresh": 0, "stale": 0, "staleOnError": 0, "negative": 0, "refreshed": 0}
 
 
 @cache.cached(timeout=3600, key_prefix="versions")
@@ -11,33 +36,177 @@ def fetch_versions(ids: [str]) -> dict:
     return request_api_bible(f"/v1/bibles?ids={','.join(ids)}")
 
 
-def fetch_books(version_id: str) -> dict:
-    return request_api_bible(f"/v1/bibles/{version_id}/books")
+def fetch_books_with_chapters(version_id: str, priority: Priority = Priority.INTERACTIVE) -> dict:
+    return request_api_bible(f"/v1/bibles/{version_id}/books?include-chapters=true", priority)
 
 
-def fetch_chapters(version_id: str, book_id: str) -> dict:
-    return request_api_bible(f"/v1/bibles/{version_id}/books/{book_id}/chapters")
+def fetch_chapter(version_id: str, chapter_id: str, priority: Priority = Priority.INTERACTIVE) -> dict:
+    return request_api_bible(f"/v1/bibles/{version_id}/chapters/{chapter_id}?include-verse-spans=true", priority)
 
 
-def fetch_chapter(version_id: str, chapter_id: str) -> dict:
-    return request_api_bible(f"/v1/bibles/{version_id}/chapters/{chapter_id}?include-verse-spans=true")
+def fetch_passages(version_id: str, passage_id: str, priority: Priority = Priority.INTERACTIVE) -> dict:
+    return request_api_bible(f"/v1/bibles/{version_id}/passages/{passage_id}", priority)
 
 
-def fetch_passages(version_id: str, passage_id: str) -> dict:
-    return request_api_bible(f"/v1/bibles/{version_id}/passages/{passage_id}")
+def get_coalescing_stats() -> dict:
+    return single_flight.stats()
 
 
-def request_api_bible(url: str) -> dict:
-    url = f"{Config.API_BIBLE_BASE_URL}{url}"
-    cached_data = cache.get(url)
+def get_upstream_health() -> dict:
+    return dict(upstream_health)
 
-    if cached_data:
-        return cached_data
-    else:
-        response = requests.get(url, headers={"api-key": Config.API_BIBLE_APP_KEY}, timeout=5)
-        response.raise_for_status()
 
-        data = response.json()
-        cache.set(url, data)
+def get_freshness_stats() -> dict:
+    return {**counters, "refreshing": len(refreshing)}
 
-        return data
+
+def record_upstream_response(elapsed: float, status_code: int):
+    upstream_health["latency"] = LATENCY_SMOOTHING * elapsed + (1 - LATENCY_SMOOTHING) * upstream_health["latency"]
+    if status_code == 429:
+        upstream_health["rateLimitedAt"] = time()
+
+
+def request_api_bible(url: str, priority: Priority = Priority.INTERACTIVE) -> dict:
+    url = f"{Config.API_BIBLE_BASE_URL}{url}"
+    entry = cache.get(url)
+
+    if entry is not None:
+        if not is_fresh(entry):
+            # served right away, while a background refresh runs
+            schedule_refresh(url)
+            counters["stale"] += 1
+        else:
+            counters["fresh"] += 1
+        return unwrap(entry, url)
+    else:
+        return unwrap(request_api_bible_coalesced(url, priority), url)
+
+
+def request_api_bible_coalesced(url: str, priority: Priority = Priority.INTERACTIVE) -> dict:
+    """
+    Sends or joins the upstream call of the URL, with a token of the caller's priority taken beforehand.
+
+    Every in-flight call holds a token, so a caller is never left with the quota rejection of a lower priority
+    one it joined. The token is given back if another call served the URL.
+    """
+    scheduler = get_scheduler()
+    key = scheduler.acquire(priority, timeout=get_max_wait())
+    if key is None:
+        error = UpstreamQuotaExceeded("The Bible API quota is exhausted, try again later")
+        return stale_or_raise(cache.get(url), error)
+
+    sent = []
+
+    def send() -> dict:
+        sent.append(key)
+        return request_api_bible_once(url, key, priority)
+
+    try:
+        # one in-flight upstream call per URL within the process...
+        return single_flight.do(url, send)
+    finally:
+        if not sent:
+            scheduler.refund(key)
+
+
+def request_api_bible_once(url: str, key: str, priority: Priority = Priority.INTERACTIVE) -> dict:
+    # ...and across worker processes sharing the cache
+    with file_lock(get_lock_dir(), url, timeout=get_lock_timeout()):
+        entry = cache.get(url)  # filled by another worker while waiting for the lock
+
+        scheduler = get_scheduler()
+        if entry is not None and is_fresh(entry):
+            scheduler.refund(key)  # not sent
+            return entry
+
+        breaker = get_breaker()
+        if not breaker.allow():
+            scheduler.refund(key)
+            return stale_or_raise(entry, UpstreamUnavailable("The Bible API is unavailable, try again later"))
+
+        started = monotonic()
+        try:
+            response = hedged_get(
+                url,
+                can_hedge=lambda: scheduler.try_acquire(key, priority),
+                headers={"api-key": key},
+                timeout=get_timeout(),
+            )
+        except RequestException as error:
+            record_upstream_response(monotonic() - started, 0)
+            breaker.record(False)
+            return stale_or_raise(entry, error)
+        record_upstream_response(monotonic() - started, response.status_code)
+        scheduler.record(key, response.status_code, response.headers)
+        breaker.record(response.status_code < 500 and response.status_code != 429)
+
+        if response.status_code == 404:
+            negative_timeout = get_negative_timeout()
+            entry = {"data": None, "status": 404, "freshUntil": time() + negative_timeout}
+            cache.set(url, entry, timeout=negative_timeout)
+            return entry
+
+        try:
+            response.raise_for_status()
+        except RequestException as error:
+            return stale_or_raise(entry, error)
+
+        timeout = get_jittered_timeout()
+        entry = {"data": response.json(), "status": response.status_code, "freshUntil": time() + timeout}
+        cache.set(url, entry, timeout=timeout + get_stale_window())
+
+        return entry
+
+
+def is_fresh(entry: dict) -> bool:
+    # entries cached before freshness tracking are considered stale
+    return entry.get("freshUntil", 0) >= time()
+
+
+def unwrap(entry: dict, url: str) -> dict:
+    if "freshUntil" not in entry:
+        return entry
+    if entry["status"] == 404:
+        counters["negative"] += 1
+        raise UpstreamResourceNotFound(f"Resource {url.removeprefix(Config.API_BIBLE_BASE_URL)} not found upstream")
+    return entry["data"]
+
+
+def stale_or_raise(entry: dict, error: Exception) -> dict:
+    """Falls back to stale data of a failing upstream call, raising the error if there is none"""
+    if entry is not None and entry.get("status", 200) != 404:
+        counters["staleOnError"] += 1
+        logging.warning("Serving stale data after upstream failure: %s", error)
+        return entry
+    raise error
+
+
+def schedule_refresh(url: str):
+    with refreshing_lock:
+        if url in refreshing:
+            return
+        refreshing.add(url)
+
+    get_refresh_executor().submit(refresh, url)
+
+
+def refresh(url: str):
+    try:
+        request_api_bible_coalesced(url, Priority.BACKGROUND)
+        counters["refreshed"] += 1
+    except Exception:  # too broad exception clause is desired, the stale entry is kept
+        logging.warning("Failed to refresh %s", url, exc_info=True)
+    finally:
+        with refreshing_lock:
+            refreshing.discard(url)
+
+
+def get_refresh_executor() -> ThreadPoolExecutor:
+    global refresh_executor
+
+    if refresh_executor is None:
+        with refreshing_lock:
+            if refresh_executor is None:
+                refresh_executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="refresh")
+
+    return refresh_executor
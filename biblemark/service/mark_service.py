@@ -1,19 +1,25 @@
+import sqlite3
 from concurrent.futures import ThreadPoolExecutor
-from typing import List
+from typing import List, Optional, Tuple
 
 from flask import g, abort
+from werkzeug.exceptions import HTTPException
 
-from biblemark.exceptions.mark_http_exceptions import MarkNotFound
+from biblemark.config.db import transaction
+from biblemark.exceptions.mark_http_exceptions import MarkNotFound, InvalidMarkOperation, InvalidMarkedVerse
 from biblemark.model.bible_book import parse_book
 from biblemark.model.bible_verse_interval import BibleVerseInterval
 from biblemark.model.mark import Mark
 from biblemark.model.marked_verse import MarkedVerse
 from biblemark.model.user import User
 from biblemark.repository.mark_repository import fetch_paginated_highlights_by_user, fetch_paginated_notes_by_user, \
-    fetch_visible_marks_by_user_and_chapter, \
-    save_mark, delete_mark_by_id, fetch_mark_by_id, soft_delete_all_highlights_at_verses
+    fetch_visible_marks_by_user_and_chapter, fetch_highlights_page_by_user, fetch_notes_page_by_user, \
+    save_mark, delete_mark_by_id, fetch_mark_by_id, soft_delete_all_highlights_at_verses, \
+    soft_delete_marked_verses_by_ids
 from biblemark.service.bible_service import get_version
 from biblemark.service.external_bible_api_service import fetch_passages
+from biblemark.service.passage_service import get_passage_content
+from biblemark.utils.request_scheduler import Priority
 
 
 def get_marks_by_user_and_chapter(user: User, version_id: str, book_id: str, chapter_id: str) -> List[Mark]:
@@ -21,16 +27,51 @@ def get_marks_by_user_and_chapter(user: User, version_id: str, book_id: str, cha
     return fetch_visible_marks_by_user_and_chapter(user, version.get_internal_id(), book_id, chapter_id)
 
 
-def get_highlights_by_user(user: User, page_number: int = 0, page_size: int = 30) -> List[dict]:
-    offset = page_number * page_size
-    marks = fetch_paginated_highlights_by_user(user, page_size, offset)
-    return enrich_marks_in_parallel(marks)
+def get_highlights_page_by_user(user: User, size: int = 30, number: int = 0, after: Optional[Tuple[str, int]] = None,
+                                before: Optional[Tuple[str, int]] = None) -> dict:
+    marks = fetch_marks_page(fetch_highlights_page_by_user, fetch_paginated_highlights_by_user,
+                             user, size, number, after, before)
+    return build_marks_page(marks, size, number, after, before)
 
 
-def get_notes_by_user(user: User, page_number: int = 0, page_size: int = 30) -> List[dict]:
-    offset = page_number * page_size
-    marks = fetch_paginated_notes_by_user(user, page_size, offset)
-    return enrich_marks_in_parallel(marks)
+def get_notes_page_by_user(user: User, size: int = 30, number: int = 0, after: Optional[Tuple[str, int]] = None,
+                           before: Optional[Tuple[str, int]] = None) -> dict:
+    marks = fetch_marks_page(fetch_notes_page_by_user, fetch_paginated_notes_by_user,
+                             user, size, number, after, before)
+    return build_marks_page(marks, size, number, after, before)
+
+
+def fetch_marks_page(fetch_by_cursor, fetch_by_offset, user: User, size: int, number: int,
+                     after: Optional[Tuple[str, int]], before: Optional[Tuple[str, int]]) -> List[Mark]:
+    """
+    Fetches the marks after or before a (marked, id) cursor, or else of a page number.
+
+    A mark beyond the page size is fetched to know if there is another page in that direction.
+    """
+    if after is not None or before is not None:
+        return fetch_by_cursor(user, size + 1, after, before)
+
+    # compatibility with page numbers, slower the deeper the page
+    return fetch_by_offset(user, size + 1, number * size)
+
+
+def build_marks_page(marks: List[Mark], size: int, number: int, after: Optional[Tuple[str, int]],
+                     before: Optional[Tuple[str, int]]) -> dict:
+    has_more = len(marks) > size
+
+    if before is not None:
+        # fetched oldest first from the cursor, so the extra mark is the newest, first once sorted newest first
+        marks = marks[-size:]
+        has_previous, has_next = has_more, True
+    else:
+        marks = marks[:size]
+        has_previous, has_next = after is not None or number > 0, has_more
+
+    return {
+        "content": enrich_marks_in_parallel(marks),
+        "hasPrevious": has_previous,
+        "hasNext": has_next,
+    }
 
 
 def enrich_marks_in_parallel(marks: List[Mark]) -> List[dict]:
@@ -50,34 +91,62 @@ def enrich_mark(mark: Mark) -> dict:
 
 
 def get_passage(verse_interval: BibleVerseInterval) -> dict:
-    response = fetch_passages(
-        version_id=verse_interval.left.version.external_id,
-        passage_id=verse_interval.to_id(),
-    )
+    # secondary to the marks, so left behind readers under quota pressure
+    passage = get_passage_content(verse_interval, Priority.ENRICHMENT)
+
+    if passage is None:
+        # not assembled from cached chapter verses
+        response = fetch_passages(
+            version_id=verse_interval.left.version.external_id,
+            passage_id=verse_interval.to_id(),
+            priority=Priority.ENRICHMENT,
+        )
+
+        if response is None:
+            abort(500)
 
-    if response is None:
-        abort(500)
+        passage = response["data"]
 
     return {
         "link": f"/{verse_interval.left.book}/{verse_interval.left.chapter_id}",
-        "content": response["data"]["content"],
-        "reference": response["data"]["reference"]
+        "content": passage["content"],
+        "reference": passage["reference"]
     }
 
 
+def validate_mark_payload(payload):
+    mark = payload.get("mark", {})
+
+    color = mark.get("color")
+    note = mark.get("note")
+
+    # highlight XOR note
+    valid_combinations = [
+        (color is not None and note is None),  # highlight
+        (color is None and note is not None),  # note
+    ]
+
+    if not any(valid_combinations):
+        raise ValueError("Invalid mark payload")
+
+
+def validate_mark_location(payload):
+    """Validates the chapter of a created mark, whose verses are returned in the response"""
+    location = payload.get("location")
+
+    if not isinstance(location, dict) or not all(
+        isinstance(location.get(key), str) for key in ("versionId", "bookId", "chapterId")
+    ):
+        raise ValueError("Invalid mark location")
+
+
 def create_mark(payload):
-    versions = {}
     marked_verses = []
 
     for markedVerse in payload["mark"]["markedVerses"]:
-        version_id = markedVerse["verse"]["versionId"]
-
-        if version_id not in versions:
-            versions[version_id] = get_version(version_id)
-
         marked_verses.append(
             MarkedVerse.factory(
-                version=versions[version_id],
+                version=get_version(markedVerse["verse"]["versionId"]),
                 book_id=parse_book(markedVerse["verse"]["bookId"]),
                 chapter_id=markedVerse["verse"]["chapterId"],
                 verse_number=markedVerse["verse"]["verseNumber"],
@@ -97,13 +166,14 @@ def create_mark(payload):
         marked_verses=marked_verses,
     )
 
-    if mark.color:
-        soft_delete_all_highlights_at_verses(mark.marked_verses)
+    with transaction():
+        if mark.color:
+            soft_delete_all_highlights_at_verses(mark.user, mark.marked_verses)
 
-    return save_mark(mark)
+        return save_mark(mark)
 
 
-def update_note_content_by(mark_id: str, mark_patch: dict):
+def update_note_content_by(mark_id: str, mark_patch: dict) -> Mark:
     mark = fetch_mark_by_id(mark_id)
 
     if not mark or mark.user.entity_id != g.principal.entity_id:
@@ -118,7 +188,7 @@ def update_note_content_by(mark_id: str, mark_patch: dict):
     if note:
         mark.note = note
 
-    save_mark(mark)
+    return save_mark(mark)
 
 
 def remove_mark(mark_id: str) -> Mark:
@@ -130,3 +200,56 @@ def remove_mark(mark_id: str) -> Mark:
     delete_mark_by_id(mark_id)
 
     return mark
+
+
+def hide_highlighted_verses(marked_verse_ids: List[str]):
+    try:
+        ids = [int(marked_verse_id) for marked_verse_id in marked_verse_ids]
+    except (TypeError, ValueError):
+        raise InvalidMarkedVerse("Invalid marked verse IDs")
+
+    soft_delete_marked_verses_by_ids(g.principal, ids)
+
+
+def apply_mark_operations(operations: List[dict]) -> List[dict]:
+    """
+    Applies creations, updates, hides and deletions of marks of the principal in a single transaction.
+
+    Each operation is applied or rolled back on its own, so a failed one doesn't affect the others.
+
+    :return: result of each operation, with its status code and the mark or the error
+    """
+    results = []
+
+    with transaction():
+        for operation in operations:
+            try:
+                with transaction():
+                    results.append({"status": 200, "mark": apply_mark_operation(operation)})
+            except HTTPException as error:
+                results.append({"status": error.code, "error": error})
+            except (AttributeError, KeyError, TypeError, ValueError, sqlite3.IntegrityError) as error:
+                results.append({"status": 400, "error": InvalidMarkOperation(f"Invalid operation: {error}")})
+
+    return results
+
+
+def apply_mark_operation(operation: dict) -> Optional[Mark]:
+    op = operation["op"]
+
+    if op == "create":
+        validate_mark_payload(operation)
+        validate_mark_location(operation)
+        return create_mark(operation)
+
+    if op == "update":
+        return update_note_content_by(operation["id"], operation["mark"])
+
+    if op == "hide":
+        hide_highlighted_verses(operation["markedVerses"])
+        return None
+
+    if op == "delete":
+        return remove_mark(operation["id"])
+
+    raise InvalidMarkOperation(f"Operation {op} not supported")
@@ -0,0 +1,129 @@
+import json
+import sqlite3
+from datetime import datetime
+from typing import Iterable, Iterator, List
+
+from werkzeug.exceptions import HTTPException
+
+from biblemark.config.db import transaction
+from biblemark.config.versions import get_version_registry
+from biblemark.exceptions.bible_http_exceptions import VersionNotFound
+from biblemark.model.bible_book import parse_book
+from biblemark.model.mark import Mark
+from biblemark.model.marked_verse import MarkedVerse
+from biblemark.model.user import User
+from biblemark.repository.mark_repository import fetch_marks_by_user_after_id, insert_marks
+from biblemark.service.mark_service import validate_mark_payload
+
+EXPORT_BATCH_SIZE = 500  # marks read per query
+IMPORT_BATCH_SIZE = 1000  # marks inserted per transaction
+MAX_REPORTED_ERRORS = 100
+
+
+def iterate_marks(user: User) -> Iterator[Mark]:
+    """
+    Yields every mark of a user, oldest first, with hidden verses included.
+
+    Marks are read in batches following the last ID, so memory stays constant
+    and no read lock is held while they are consumed.
+    """
+    after_id = 0
+
+    while True:
+        marks = fetch_marks_by_user_after_id(user, after_id, EXPORT_BATCH_SIZE)
+        yield from marks
+
+        if len(marks) < EXPORT_BATCH_SIZE:
+            return
+
+        after_id = marks[-1].entity_id
+
+
+def import_marks(user: User, lines: Iterable) -> dict:
+    """
+    Imports marks of NDJSON lines, as exported, for a user.
+
+    Records are validated with the models and inserted in transactional batches, so only
+    a batch is held in memory. Invalid records are skipped and reported by line number.
+    Marks are added to the existing ones, so importing the same lines twice duplicates them.
+
+    :return: counts of imported and skipped marks, and the errors of the skipped ones
+    """
+    summary = {"imported": 0, "skipped": 0, "errors": []}
+    batch = []
+
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode("utf8")
+        if not line.strip():
+            continue
+
+        try:
+            batch.append(parse_mark_record(json.loads(line), user))
+        except HTTPException as error:
+            skip(summary, number, error.description)
+        except (AttributeError, KeyError, TypeError, ValueError) as error:
+            skip(summary, number, str(error))
+
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            insert_batch(batch, summary)
+            batch = []
+
+    if batch:
+        insert_batch(batch, summary)
+
+    return summary
+
+
+def parse_mark_record(record: dict, user: User) -> Mark:
+    validate_mark_payload({"mark": record})
+
+    marked = record.get("marked")
+    # stored as the dates of new marks, to keep the order of pages
+    marked = str(datetime.fromisoformat(marked)) if marked is not None else datetime.now()
+
+    marked_verses = list(map(parse_marked_verse_record, record["markedVerses"]))
+    if len({marked_verse.verse.to_versioned_id() for marked_verse in marked_verses}) < len(marked_verses):
+        raise ValueError("Repeated verse in mark")
+
+    return Mark(
+        user=user,
+        color=record.get("color"),
+        note=record.get("note"),
+        marked_verses=marked_verses,
+        marked=marked,
+    )
+
+
+def parse_marked_verse_record(record: dict) -> MarkedVerse:
+    verse = record["verse"]
+
+    # disabled versions are kept, as in the marks of this instance
+    version = get_version_registry().get(verse["versionId"])
+    if version is None:
+        raise VersionNotFound(f"Version {verse['versionId']} not found")
+
+    return MarkedVerse.factory(
+        version=version,
+        book_id=parse_book(verse["bookId"]),
+        chapter_id=verse["chapterId"],
+        verse_number=int(verse["verseNumber"]),
+        visibility=record.get("visible", True),
+    )
+
+
+def insert_batch(marks: List[Mark], summary: dict):
+    try:
+        with transaction():
+            insert_marks(marks)
+        summary["imported"] += len(marks)
+    except sqlite3.IntegrityError as error:
+        # a constraint not checked by the models, rejecting the whole batch
+        summary["skipped"] += len(marks)
+        summary["errors"].append(f"Batch of {len(marks)} marks: {error}")
+
+
+def skip(summary: dict, line_number: int, reason: str):
+    summary["skipped"] += 1
+    if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+        summary["errors"].append(f"Line {line_number}: {reason}")
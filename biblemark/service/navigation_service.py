@@ -0,0 +1,49 @@
+import threading
+
+from biblemark.config.cache import get_cache_generation
+from biblemark.config.versions import get_version_registry
+from biblemark.model.bible_navigation_index import BibleNavigationIndex
+from biblemark.model.bible_version import Version
+from biblemark.repository.chapter_store_repository import fetch_chapter_store
+from biblemark.service.external_bible_api_service import fetch_books_with_chapters
+from biblemark.utils.request_scheduler import Priority
+
+indexes = {}  # internal version ID -> (generation, BibleNavigationIndex)
+indexes_lock = threading.Lock()
+
+
+def get_navigation_generation() -> tuple:
+    """Changes when the cache is cleared or the versions are reloaded, in any process"""
+    return get_cache_generation(), get_version_registry().generation
+
+
+def get_navigation_index(version: Version, priority: Priority = Priority.INTERACTIVE) -> BibleNavigationIndex:
+    """
+    Returns the navigation index of a version, built once per process and generation.
+
+    The index comes from the packed store of the version, if ingested, or from a single
+    books-with-chapters upstream request, so books and chapters lists and chapter ID
+    lookups need no further upstream calls. It's rebuilt after the cache is cleared or
+    the versions are reloaded.
+    """
+    generation = get_navigation_generation()
+    entry = indexes.get(version.get_internal_id())
+
+    if entry is None or entry[0] != generation:
+        # concurrent builds share the same coalesced upstream request
+        index = build_navigation_index(version, priority)
+        with indexes_lock:
+            entry = indexes.get(version.get_internal_id())
+            if entry is None or entry[0] != generation:
+                entry = indexes[version.get_internal_id()] = (generation, index)
+
+    return entry[1]
+
+
+def build_navigation_index(version: Version, priority: Priority = Priority.INTERACTIVE) -> BibleNavigationIndex:
+    store = fetch_chapter_store(version.get_internal_id())
+    if store is not None:
+        return BibleNavigationIndex(store.books, store.chapters)
+
+    books = fetch_books_with_chapters(version.external_id, priority)["data"]
+    return BibleNavigationIndex.from_books_with_chapters(books)
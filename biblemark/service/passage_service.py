@@ -0,0 +1,76 @@
+from typing import Optional
+
+from biblemark.model.bible_reference_formatter import BibleReferenceFormatter
+from biblemark.model.bible_verse_interval import BibleVerseInterval
+from biblemark.service.bible_service import load_chapter_verses
+from biblemark.utils.request_scheduler import Priority
+from biblemark.utils.verse_parser import join_verses
+
+MAX_CHAPTERS = 3  # chapters assembled locally, longer intervals are fetched as a single passage
+
+
+def get_passage_content(verse_interval: BibleVerseInterval,
+                        priority: Priority = Priority.INTERACTIVE) -> Optional[dict]:
+    """
+    Assembles the content and reference of a verse interval from verses of cached chapters.
+
+    Each chapter is fetched and split into verses once, so overlapping or distinct
+    intervals of the same chapter need no further upstream calls. Intervals across books
+    or more than MAX_CHAPTERS chapters are left to a single passage request.
+
+    :param verse_interval: interval of verses of the same version
+    :param priority: priority of the upstream requests for missing chapters
+    :return: dict with "content" and "reference", or None if the interval can't be assembled locally
+    """
+    version = verse_interval.left.version
+    chapter_ranges = list_chapter_ranges(verse_interval)
+
+    if chapter_ranges is None:
+        return None
+
+    chapters = []
+
+    for book_id, chapter_number, first, last in chapter_ranges:
+        chapter = load_chapter_verses(version, f"{book_id}.{chapter_number}", priority)
+        numbers = sorted((number for number in chapter["verses"]), key=int)
+        if last is None:
+            last = int(numbers[-1]) if numbers else first
+
+        if str(first) not in chapter["verses"] or str(last) not in chapter["verses"]:
+            return None
+
+        chapters.append((chapter, [number for number in numbers if first <= int(number) <= last]))
+
+    return {
+        "content": join_verses(chapters),
+        "reference": BibleReferenceFormatter.format_interval(verse_interval),
+    }
+
+
+def list_chapter_ranges(verse_interval: BibleVerseInterval) -> Optional[list]:
+    """
+    Lists the chapters covered by an interval, with the first and last verse numbers in each.
+    The last verse is None when the chapter is covered to its end.
+
+    :return: list of (book ID, chapter number, first verse, last verse), or None for non-numeric chapters,
+    intervals across books or covering more than MAX_CHAPTERS chapters
+    """
+    left, right = verse_interval.left, verse_interval.right
+
+    if not left.chapter_id.isdigit() or not right.chapter_id.isdigit() or left.book != right.book:
+        return None
+
+    first_chapter, last_chapter = int(left.chapter_id), int(right.chapter_id)
+
+    if last_chapter - first_chapter + 1 > MAX_CHAPTERS:
+        return None
+
+    return [
+        (
+            left.book.get_id(),
+            chapter_number,
+            int(left.verse_number) if chapter_number == first_chapter else 1,
+            int(right.verse_number) if chapter_number == last_chapter else None,
+        )
+        for chapter_number in range(first_chapter, last_chapter + 1)
+    ]
@@ -0,0 +1,100 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+
+from flask import current_app
+
+from biblemark.model.bible_version import Version
+from biblemark.repository.chapter_store_repository import fetch_chapter_store
+from biblemark.service.bible_service import load_chapter
+from biblemark.service.external_bible_api_service import get_upstream_health
+from biblemark.utils.request_scheduler import Priority
+
+executor = None
+executor_lock = threading.Lock()
+
+pending = set()  # (external version ID, chapter ID) queued or running
+pending_lock = threading.Lock()
+
+counters = {"scheduled": 0, "completed": 0, "failed": 0, "skipped": 0}
+
+
+def prefetch_adjacent_chapters(version: Version, chapter_content: dict):
+    """
+    Warms the cache for the chapters adjacent to a served chapter, in the background.
+
+    Sequential readers then find the next chapter already cached. Prefetching is
+    skipped while the upstream is slow or rate-limited, or when the queue is full.
+    """
+    config = current_app.config
+
+    if not config["PREFETCH_ENABLED"]:
+        return
+
+    targets = [chapter_content.get("next")]
+    if config["PREFETCH_PREVIOUS"]:
+        targets.append(chapter_content.get("previous"))
+
+    for target in targets:
+        if target is not None:
+            schedule_prefetch(version, target["id"], config)
+
+
+def schedule_prefetch(version: Version, chapter_id: str, config):
+    store = fetch_chapter_store(version.get_internal_id())
+    if store is not None and store.get_chapter(chapter_id) is not None:
+        return
+
+    if is_upstream_degraded(config):
+        counters["skipped"] += 1
+        return
+
+    key = (version.external_id, chapter_id)
+
+    with pending_lock:
+        if key in pending:
+            return
+        if len(pending) >= config["PREFETCH_MAX_PENDING"]:
+            counters["skipped"] += 1
+            return
+        pending.add(key)
+
+    counters["scheduled"] += 1
+    get_executor(config["PREFETCH_WORKERS"]).submit(prefetch_chapter, version, chapter_id)
+
+
+def prefetch_chapter(version: Version, chapter_id: str):
+    """Loads a chapter as the reader does, so its verses are parsed and cached as well"""
+    try:
+        load_chapter(version, chapter_id, Priority.BACKGROUND)
+        counters["completed"] += 1
+    except Exception:  # too broad exception clause is desired, prefetching is best-effort
+        counters["failed"] += 1
+        logging.warning("Failed to prefetch chapter %s of version %s", chapter_id, version.external_id, exc_info=True)
+    finally:
+        with pending_lock:
+            pending.discard((version.external_id, chapter_id))
+
+
+def is_upstream_degraded(config) -> bool:
+    health = get_upstream_health()
+    return (
+        health["latency"] > config["PREFETCH_MAX_UPSTREAM_LATENCY"]
+        or time() - health["rateLimitedAt"] < config["PREFETCH_RATE_LIMIT_BACKOFF"]
+    )
+
+
+def get_executor(workers: int) -> ThreadPoolExecutor:
+    global executor
+
+    if executor is None:
+        with executor_lock:
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+
+    return executor
+
+
+def get_prefetch_stats() -> dict:
+    return {**counters, "pending": len(pending)}
@@ -0,0 +1,50 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from biblemark.model.mark import Mark
+from biblemark.model.user import User
+from biblemark.repository.mark_repository import fetch_visible_marks_by_user_and_chapter
+from biblemark.service.bible_service import get_version, resolve_chapter, load_chapter
+from biblemark.service.prefetch_service import prefetch_adjacent_chapters
+
+CHAPTER_WORKERS = 16  # as many as pooled upstream connections
+
+executor = None
+executor_lock = threading.Lock()
+
+
+def get_chapter_with_marks(user: Optional[User], version_id, book_id, chapter_id) -> (dict, List[Mark]):
+    """
+    Loads a chapter and the visible marks of a user in it, concurrently.
+
+    The chapter is loaded in a worker thread while the marks are queried in the calling
+    thread, which owns the request's database connection.
+
+    :param user: user whose marks are loaded, or None for no marks
+    :return: chapter content and marks
+    """
+    version = get_version(version_id)
+    book, external_chapter_id = resolve_chapter(version, book_id, chapter_id)
+
+    future = get_executor().submit(load_chapter, version, external_chapter_id)
+
+    marks = []
+    if user is not None:
+        marks = fetch_visible_marks_by_user_and_chapter(user, version.get_internal_id(), book["id"], str(chapter_id))
+
+    chapter_content = future.result()["data"]
+    prefetch_adjacent_chapters(version, chapter_content)
+
+    return chapter_content, marks
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global executor
+
+    if executor is None:
+        with executor_lock:
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=CHAPTER_WORKERS, thread_name_prefix="chapter")
+
+    return executor
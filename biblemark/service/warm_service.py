@@ -0,0 +1,82 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
+
+from biblemark.repository.mark_repository import fetch_most_marked_chapters
+from biblemark.service.bible_service import get_version, get_versions, load_chapter
+from biblemark.service.navigation_service import get_navigation_index
+from biblemark.utils.helpers import associate_by
+from biblemark.utils.request_scheduler import Priority
+
+SCOPE_LISTS = "lists"
+SCOPE_TOP = "top"
+SCOPE_FULL = "full"
+
+
+def warm_cache(version_id: str, scope: str = SCOPE_LISTS, top: int = 50, workers: int = 4,
+               echo: Callable[[str], None] = print):
+    """
+    Loads a version into the cache.
+
+    :param version_id: internal version ID
+    :param scope: "lists" for books and chapters lists only, "top" for the lists and the most marked chapters,
+    or "full" for the lists and every chapter
+    :param top: number of chapters of the "top" scope
+    :param workers: maximum concurrent upstream requests
+    :param echo: progress output
+    """
+    version = get_version(version_id)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        chapters_by_book = warm_navigation(version)
+        echo(f"[{version_id}] Loaded {len(chapters_by_book)} books with their chapters")
+
+        if scope == SCOPE_LISTS:
+            return
+
+        if scope == SCOPE_TOP:
+            targets = []
+            for row in fetch_most_marked_chapters(version.get_internal_id(), top):
+                chapter = chapters_by_book.get(row["book_id"], {}).get(row["chapter_id"])
+                if chapter is not None:
+                    targets.append(chapter["id"])
+        else:
+            targets = [chapter["id"] for chapters in chapters_by_book.values() for chapter in chapters.values()]
+
+        futures = [executor.submit(load_chapter, version, chapter_id, Priority.BACKGROUND) for chapter_id in targets]
+        failed = 0
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                future.result()
+            except Exception:  # too broad exception clause is desired, warming is best-effort
+                failed += 1
+                logging.warning("Failed to warm a chapter of version %s", version_id, exc_info=True)
+
+            if done % 50 == 0 or done == len(futures):
+                echo(f"[{version_id}] {done}/{len(futures)} chapters")
+
+        if failed:
+            echo(f"[{version_id}] {failed} chapter(s) failed")
+
+
+def warm_navigation(version) -> dict:
+    """Loads the navigation index of a version, returning chapters by number by book ID"""
+    index = get_navigation_index(version, Priority.BACKGROUND)
+    return {book["id"]: associate_by(index.get_chapters(book["id"]), "number") for book in index.get_books()}
+
+
+def warm_on_start(app):
+    """Preloads supported versions and their navigation lists before the app serves requests"""
+    with app.app_context():
+        try:
+            versions = get_versions()
+        except Exception:  # too broad exception clause is desired, serving must not depend on warming
+            logging.warning("Failed to load versions to warm on start", exc_info=True)
+            return
+
+        for version in versions:
+            try:
+                warm_cache(version["id"], SCOPE_LISTS, echo=logging.info)
+            except Exception:  # too broad exception clause is desired, serving must not depend on warming
+                logging.warning("Failed to warm version %s on start", version["id"], exc_info=True)
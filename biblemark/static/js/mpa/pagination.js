@@ -6,6 +6,8 @@
 
         function updateURL(page, size) {
             const currentURL = new URL(window.location.href);
+            currentURL.searchParams.delete('after');
+            currentURL.searchParams.delete('before');
             currentURL.searchParams.set('page', page);
             currentURL.searchParams.set('size', size);
             window.location.href = currentURL.toString();
@@ -64,7 +64,7 @@ class App {
         this.controller = new Controller(this.model, this.view, this.client);
 
         const { versionId, bookId, chapterId } = this._getLocation();
-        this.controller.init(versionId, bookId, chapterId);
+        this.controller.init(versionId, bookId, chapterId, this._getInitialState());
     }
 
     _validateConfig() {
@@ -102,6 +102,14 @@ class App {
 
         return { versionId, bookId, chapterId }
     }
+
+    /**
+     * @returns {InitialState|null} data of the server-rendered first paint, if any
+     */
+    _getInitialState = () => {
+        const element = document.getElementById('initial-state');
+        return element ? JSON.parse(element.textContent) : null;
+    }
 }
 
 new App({
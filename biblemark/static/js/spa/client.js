@@ -1,3 +1,5 @@
+import MarkBatcher from "./markBatcher.js";
+
 export default class Client {
 
     /**
@@ -5,6 +7,7 @@ export default class Client {
      */
     constructor(baseUrl = '') {
         this.baseUrl = baseUrl;
+        this.markBatcher = new MarkBatcher(this.postMarkBatch);
     }
 
     /**
@@ -173,30 +176,44 @@ export default class Client {
         this._request(new URL(`/api/marks/versions/${versionId}/books/${bookId}/chapters/${chapterId}`, this.baseUrl));
 
     /**
+     * @typedef ChapterWithMarksResponse
+     * @type {object}
+     * @property {Chapter} chapter
+     * @property {ChapterLinks} _links
+     * @property {[MarkResponseItem]} marks - empty if there's no authenticated user
+     */
+
+    /**
+     * @param {string} versionId
+     * @param {string} bookId
+     * @param {string} chapterId
+     * @returns {Promise<ChapterWithMarksResponse>}
+     */
+    fetchChapterWithMarks = (versionId, bookId, chapterId) =>
+        this._request(new URL(`/api/reader/versions/${versionId}/books/${bookId}/chapters/${chapterId}`, this.baseUrl));
+
+    /**
+     * Mark changes are batched, so rapid user actions cost a single request.
+     *
      * @param {Mark} mark
      * @returns {Promise<*>}
      */
     postMark = mark =>
-        this._request(new URL('/api/marks', this.baseUrl), HTTPMethod.POST, mark);
+        this.markBatcher.enqueue({ op: 'create', ...mark });
 
     /**
      * @param {[string]} markedVerseIds
      * @returns {Promise<*>}
      */
-    deleteHighlights = (markedVerseIds = []) => {
-        const url = new URL('/api/marks/highlights', this.baseUrl);
-        if (markedVerseIds.length > 0) {
-            url.searchParams.append('markedVerses', markedVerseIds.join());
-        }
-        return this._request(url, HTTPMethod.DELETE);
-    }
+    deleteHighlights = (markedVerseIds = []) =>
+        this.markBatcher.enqueue({ op: 'hide', markedVerses: markedVerseIds });
 
     /**
      * @param {string} markId
      * @returns {Promise<*>}
      */
     deleteMark = markId =>
-        this._request(new URL(`/api/marks/${markId}`, this.baseUrl), HTTPMethod.DELETE);
+        this.markBatcher.enqueue({ op: 'delete', id: markId });
 
     /**
      * @param {Mark} markId
@@ -204,7 +221,14 @@ export default class Client {
      * @returns {Promise<*>}
      */
     patchMark = (markId, body) =>
-        this._request(new URL(`/api/marks/${markId}`, this.baseUrl), HTTPMethod.PATCH, body)
+        this.markBatcher.enqueue({ op: 'update', id: markId, mark: body });
+
+    /**
+     * @param {[MarkOperation]} operations
+     * @returns {Promise<{results: [MarkOperationResult]}>}
+     */
+    postMarkBatch = operations =>
+        this._request(new URL('/api/marks/batch', this.baseUrl), HTTPMethod.POST, { operations });
 
     /**
      * @param {URL} url
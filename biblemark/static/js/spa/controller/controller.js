@@ -27,6 +27,30 @@ export default class Controller {
 
         this.view.control.bindHighlightAction(this.handleHighlightAction);
         this.view.control.bindAddNoteAction(this.handleAddNote);
+    }
+
+    /**
+     * @typedef InitialState
+     * @type {object}
+     * @property {User|null} user
+     * @property {[VersionResponseItem]} versions
+     * @property {[BookResponseItem]} books
+     * @property {[ChapterResponseItem]} chapters
+     * @property {ChapterResponse} chapter
+     * @property {[MarkResponseItem]} marks
+     */
+
+    /**
+     * @param {string} versionId
+     * @param {string} bookId
+     * @param {string} chapterId
+     * @param {InitialState|null} initialState - data of the server-rendered first paint
+     */
+    init = (versionId, bookId, chapterId, initialState = null) => {
+        if (initialState) {
+            this._hydrate(initialState);
+            return;
+        }
 
         this.client.fetchMe().then(() => {
             this.hasAuthenticatedUser = true;
@@ -35,14 +59,7 @@ export default class Controller {
         }).finally(() => {
             this.view.bible.setMarkable(this.hasAuthenticatedUser);
         });
-    }
 
-    /**
-     * @param {string} versionId
-     * @param {string} bookId
-     * @param {string} chapterId
-     */
-    init = (versionId, bookId, chapterId) => {
         this.client.fetchVersions()
             .then(response => {
                 this.model.versions = response.versions;
@@ -83,29 +100,14 @@ export default class Controller {
         this.view.nav.disableAllSelectElements();
         this.view.bible.startLoading();
 
-        return this.client.fetchChapter(versionId, bookId, chapterId)
-            .then(async response => {
-                this.model.versionId = response.chapter.versionId;
-                this.model.bookId = response.chapter.bookId;
-                this.model.chapterId = response.chapter.chapterId;
-
-                this.model.prev = response._links.prev;
-                this.model.next = response._links.next;
-
-                this.model.title = response.chapter.reference;
-                this.model.content = response.chapter.content;
+        return this.client.fetchChapterWithMarks(versionId, bookId, chapterId)
+            .then(response => {
+                this._setChapter(response);
 
                 history.pushState(null, '', response._links.self.href);
                 this.view.bible.renderContent(this.model.versionId, this.model.title, this.model.content);
 
-                if (this.hasAuthenticatedUser) {
-                    await this.client.fetchChapterMarks(versionId, bookId, chapterId).then(response => {
-                        this.model.setMarks(response.marks.map(Mark.fromMarkResponse));
-                    });
-                } else {
-                    this.model.setMarks([]);
-                }
-
+                this.model.setMarks(response.marks.map(Mark.fromMarkResponse));
                 this.view.bible.renderMarks(this.model.getMarksByTypeByVersionedVerseId());
             }).catch(error => {
                 this.view.notifier.notifyError(error.message);
@@ -116,6 +118,50 @@ export default class Controller {
             });
     }
 
+    /**
+     * Binds the server-rendered page to the model and views, with no requests.
+     * @param {InitialState} state
+     * @private
+     */
+    _hydrate = state => {
+        this.hasAuthenticatedUser = state.user !== null;
+        this.view.bible.setMarkable(this.hasAuthenticatedUser);
+
+        this.model.versions = state.versions;
+        this.model.books = state.books;
+        this.model.chapters = state.chapters;
+        this._setChapter(state.chapter);
+
+        history.replaceState(null, '', state.chapter._links.self.href);
+
+        this.view.nav.renderVersionSelectElement(this.model.versions, this.model.versionId);
+        this.view.nav.renderBookSelectElement(this.model.books, this.model.bookId);
+        this.view.nav.renderChapterSelectElement(this.model.chapters, this.model.chapterId);
+
+        this.view.bible.renderContent(this.model.versionId, this.model.title, this.model.content);
+        this.model.setMarks(state.marks.map(Mark.fromMarkResponse));
+        this.view.bible.renderMarks(this.model.getMarksByTypeByVersionedVerseId());
+
+        this.view.nav.enableAllSelectElements();
+        this.view.bible.stopLoading();
+    }
+
+    /**
+     * @param {ChapterResponse} response
+     * @private
+     */
+    _setChapter = response => {
+        this.model.versionId = response.chapter.versionId;
+        this.model.bookId = response.chapter.bookId;
+        this.model.chapterId = response.chapter.chapterId;
+
+        this.model.prev = response._links.prev;
+        this.model.next = response._links.next;
+
+        this.model.title = response.chapter.reference;
+        this.model.content = response.chapter.content;
+    }
+
     /**
      * @callback changeVersionHandlerCallback
      * @param {string} versionId
@@ -330,19 +376,21 @@ export default class Controller {
             });
         });
 
-        this.client.deleteHighlights(selectedHighlightedVerses.map(markedVerse => markedVerse.id)).then(response => {
-            selectedMarks.highlights.forEach(marks => {
-                marks.forEach(mark => {
-                    mark.markedVerses.forEach((markedVerse, versionedVerseId) => {
-                        if (this.model.getSelection().has(versionedVerseId)) {
-                            this.model.deleteHighlightedVerseById(mark.id, markedVerse.id);
-                        }
-                    });
+        // sent in the same batch as the new highlight
+        this.client.deleteHighlights(selectedHighlightedVerses.map(markedVerse => markedVerse.id))
+            .catch(error => console.error(error));
+
+        selectedMarks.highlights.forEach(marks => {
+            marks.forEach(mark => {
+                mark.markedVerses.forEach((markedVerse, versionedVerseId) => {
+                    if (this.model.getSelection().has(versionedVerseId)) {
+                        this.model.deleteHighlightedVerseById(mark.id, markedVerse.id);
+                    }
                 });
             });
-
-            this._saveHighlight(selectedColorCode);
         });
+
+        this._saveHighlight(selectedColorCode);
     }
 
     _saveHighlight = colorCode => {
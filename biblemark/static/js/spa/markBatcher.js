@@ -0,0 +1,71 @@
+export default class MarkBatcher {
+
+    /**
+     * @typedef MarkOperation
+     * @type {object}
+     * @property {string} op - create, update, hide or delete
+     */
+
+    /**
+     * @typedef MarkOperationResult
+     * @type {object}
+     * @property {number} status
+     * @property {MarkResponseItem} [mark]
+     * @property {string} [description]
+     */
+
+    /**
+     * Queues mark operations of rapid user actions, sending them together in a single batch request.
+     *
+     * @param {function([MarkOperation]): Promise<{results: [MarkOperationResult]}>} send
+     * @param {number} delay - milliseconds waiting for more operations before sending
+     * @param {number} maxOperations - operations per batch request, as accepted by the server
+     */
+    constructor(send, delay = 50, maxOperations = 100) {
+        this.send = send;
+        this.delay = delay;
+        this.maxOperations = maxOperations;
+        this.queue = [];
+        this.timer = null;
+    }
+
+    /**
+     * @param {MarkOperation} operation
+     * @returns {Promise<MarkResponseItem|null>} mark of the operation, rejected if it failed
+     */
+    enqueue = operation =>
+        new Promise((resolve, reject) => {
+            this.queue.push({ operation, resolve, reject });
+
+            if (this.queue.length >= this.maxOperations) {
+                this.flush();
+            } else if (this.timer === null) {
+                this.timer = setTimeout(this.flush, this.delay);
+            }
+        });
+
+    flush = () => {
+        clearTimeout(this.timer);
+        this.timer = null;
+
+        const batch = this.queue.splice(0, this.maxOperations);
+        if (batch.length === 0) return;
+
+        this.send(batch.map(item => item.operation))
+            .then(response => {
+                response.results.forEach((result, i) => {
+                    if (result.status >= 400) {
+                        batch[i].reject(new Error(result.description));
+                    } else {
+                        batch[i].resolve(result.mark ?? null);
+                    }
+                });
+            }).catch(error => {
+                batch.forEach(item => item.reject(error));
+            });
+
+        if (this.queue.length > 0) {
+            this.timer = setTimeout(this.flush, this.delay);
+        }
+    }
+}
@@ -0,0 +1,82 @@
+import threading
+from collections import deque
+from time import monotonic
+
+
+class CircuitBreaker:
+    """
+    Fails fast while a dependency is erroring, instead of waiting for it on every call.
+
+    The circuit opens when the failure rate of the latest calls crosses the threshold.
+    After a cooldown, a single probe call is allowed (half-open): its success closes
+    the circuit, and its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_rate: float = 0.5, window: int = 20, min_calls: int = 10, cooldown: float = 30):
+        """
+        :param failure_rate: ratio of failed calls in the window opening the circuit
+        :param window: number of latest calls considered
+        :param min_calls: minimum calls in the window before the circuit may open
+        :param cooldown: time in seconds before probing an open circuit
+        """
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.outcomes = deque(maxlen=window)  # True for success
+        self.state = CircuitBreaker.CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+        self.counters = {"opened": 0, "rejected": 0}
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == CircuitBreaker.OPEN:
+                if monotonic() - self.opened_at < self.cooldown:
+                    self.counters["rejected"] += 1
+                    return False
+                self.state = CircuitBreaker.HALF_OPEN
+                self.probing = False
+
+            if self.state == CircuitBreaker.HALF_OPEN:
+                if self.probing:
+                    self.counters["rejected"] += 1
+                    return False
+                self.probing = True
+
+            return True
+
+    def record(self, success: bool):
+        with self.lock:
+            if self.state == CircuitBreaker.HALF_OPEN:
+                self.probing = False
+                if success:
+                    self.state = CircuitBreaker.CLOSED
+                    self.outcomes.clear()
+                else:
+                    self._open()
+                return
+
+            self.outcomes.append(success)
+            failures = self.outcomes.count(False)
+
+            if len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.failure_rate:
+                self._open()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.outcomes.count(False),
+            "calls": len(self.outcomes),
+            **self.counters,
+        }
+
+    def _open(self):
+        self.state = CircuitBreaker.OPEN
+        self.opened_at = monotonic()
+        self.outcomes.clear()
+        self.counters["opened"] += 1
@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import threading
+from typing import Callable
+
+
+class ConnectionPool:
+    """
+    Idle SQLite connections of a process, reused across requests.
+
+    A connection is used by a single thread at a time, but not always the one that opened it.
+    Connections inherited from a parent process are never reused, as forked workers must open their own.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], size: int):
+        """
+        :param connect: opens a new connection
+        :param size: maximum idle connections kept, extra ones are closed when released
+        """
+        self.connect = connect
+        self.size = size
+        self.idle = []  # the most recently used connection is reused first
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.counters = {"opened": 0, "reused": 0}
+
+    def acquire(self) -> sqlite3.Connection:
+        with self.lock:
+            self._check_fork()
+            if self.idle:
+                self.counters["reused"] += 1
+                return self.idle.pop()
+            self.counters["opened"] += 1
+
+        return self.connect()
+
+    def release(self, connection: sqlite3.Connection):
+        if connection.in_transaction:
+            connection.rollback()  # left open by an error
+
+        with self.lock:
+            if os.getpid() == self.pid and len(self.idle) < self.size:
+                self.idle.append(connection)
+                return
+
+        connection.close()
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+
+        if os.getpid() == self.pid:
+            for connection in idle:
+                connection.close()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"idle": len(self.idle), **self.counters}
+
+    def _check_fork(self):
+        if os.getpid() != self.pid:
+            self.idle = []
+            self.pid = os.getpid()
@@ -0,0 +1,28 @@
+import threading
+from collections import deque
+from typing import Optional
+
+
+class LatencyWindow:
+    """Keeps the latest latency samples to estimate percentiles"""
+
+    def __init__(self, size: int = 100):
+        self.samples = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, p: float, min_samples: int = 20) -> Optional[float]:
+        """
+        :param p: percentile between 0 and 1 (e.g. 0.95)
+        :param min_samples: minimum samples for a meaningful estimate
+        :return: latency in seconds, or None if there are too few samples
+        """
+        with self.lock:
+            if len(self.samples) < min_samples:
+                return None
+            ordered = sorted(self.samples)
+
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
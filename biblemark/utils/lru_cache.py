@@ -0,0 +1,73 @@
+import threading
+from collections import OrderedDict
+from time import time
+from typing import Any, Optional, Tuple
+
+
+class ByteBoundedLRUCache:
+    """
+    Thread-safe least-recently-used cache bounded by the total byte size of its entries.
+
+    Sizes are informed by the caller (e.g. serialized size), since measuring
+    nested Python objects precisely is expensive. Entries expire at an absolute
+    epoch time, where 0 means no expiration.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()  # key -> (value, size, expires)
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                return False, None
+
+            value, size, expires = entry
+
+            if expires != 0 and expires < time():
+                self._remove(key)
+                return False, None
+
+            self.entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any, size: int, expires: int):
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+
+            if size > self.max_bytes:
+                return  # would evict everything else
+
+            self.entries[key] = (value, size, expires)
+            self.size += size
+
+            while self.size > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+
+    def delete(self, key: str):
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "maxBytes": self.max_bytes,
+        }
+
+    def _remove(self, key: str) -> Optional[tuple]:
+        entry = self.entries.pop(key)
+        self.size -= entry[1]
+        return entry
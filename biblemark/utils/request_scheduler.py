@@ -0,0 +1,188 @@
+import threading
+from enum import IntEnum
+from time import monotonic, time
+from typing import Optional
+
+
+class Priority(IntEnum):
+    """Classes of outbound requests, the lower the value the higher the priority"""
+    INTERACTIVE = 0  # a reader waiting for the response
+    ENRICHMENT = 1  # secondary content of a page, e.g. passages of notes
+    BACKGROUND = 2  # prefetching, warming, packing and refreshing stale entries
+
+
+class KeyQuota:
+    """Token bucket and quota period of a single API key"""
+
+    def __init__(self, key: str, rate: float, burst: int, quota: int, period: float):
+        self.key = key
+        self.rate = rate
+        self.burst = burst
+        self.quota = quota
+        self.period = period
+        self.tokens = float(burst)
+        self.updated = monotonic()
+        self.used = 0
+        self.period_start = time()
+        self.reported_remaining = None  # from the upstream rate limit headers, if sent
+
+    def refill(self):
+        now = monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if time() - self.period_start >= self.period:
+            self.used = 0
+            self.period_start = time()
+            self.reported_remaining = None
+
+    def remaining(self) -> int:
+        remaining = self.quota - self.used
+        if self.reported_remaining is not None:
+            remaining = min(remaining, self.reported_remaining)
+        return max(0, remaining)
+
+    def headroom(self) -> float:
+        """Fraction of the bucket and of the quota left, whichever is the lowest"""
+        return min(self.tokens / self.burst, self.remaining() / self.quota)
+
+    def stats(self) -> dict:
+        return {
+            "key": f"...{self.key[-4:]}",
+            "tokens": round(self.tokens, 2),
+            "used": self.used,
+            "remaining": self.remaining(),
+        }
+
+
+class RequestScheduler:
+    """
+    Grants outbound requests by priority, within the rate limit and quota of the API keys.
+
+    Each key has a token bucket refilled at its rate limit and a request quota per period.
+    Lower priorities must leave a reserved fraction of both, so they slow down first under
+    pressure, and they never overtake a higher priority request waiting for a token.
+    Requests are spread across keys by the headroom left in each.
+
+    Usage is tracked per process, so the quota should be split between worker processes.
+    """
+
+    def __init__(self, keys: [str], rate: float, burst: int, quota: int, period: float, reserves: dict):
+        """
+        :param keys: API keys
+        :param rate: requests per second of each key
+        :param burst: maximum requests of each key sent at once
+        :param quota: requests of each key per period
+        :param period: quota period in seconds
+        :param reserves: fraction of the bucket and of the quota left untouched by each priority
+        """
+        self.keys = [KeyQuota(key, rate, burst, quota, period) for key in keys]
+        self.rate = rate
+        self.reserves = reserves
+        self.condition = threading.Condition()
+        self.waiting = {priority: 0 for priority in Priority}
+        self.counters = {
+            "granted": {priority.name.lower(): 0 for priority in Priority},
+            "rejected": {priority.name.lower(): 0 for priority in Priority},
+        }
+
+    def acquire(self, priority: Priority, timeout: float) -> Optional[str]:
+        """
+        Waits for a token of any key.
+
+        :param priority: priority of the request
+        :param timeout: maximum time in seconds waiting for a token
+        :return: the API key to send the request with, or None if the request must not be sent
+        """
+        deadline = monotonic() + timeout
+
+        with self.condition:
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    key = self._take(priority)
+                    if key is not None:
+                        self.counters["granted"][priority.name.lower()] += 1
+                        return key
+
+                    remaining = deadline - monotonic()
+                    if remaining <= 0 or not self._has_quota(priority):
+                        # waiting for the next quota period would take too long
+                        self.counters["rejected"][priority.name.lower()] += 1
+                        return None
+
+                    self.condition.wait(min(remaining, 1 / self.rate))
+            finally:
+                self.waiting[priority] -= 1
+                self.condition.notify_all()
+
+    def try_acquire(self, key: str, priority: Priority) -> bool:
+        """Takes a token of the given key without waiting, e.g. for a duplicate request"""
+        with self.condition:
+            quota = self._get(key)
+            quota.refill()
+            if self._can_take(quota, priority):
+                self._consume(quota)
+                return True
+            return False
+
+    def refund(self, key: str):
+        """Gives back the token of a request that wasn't sent"""
+        with self.condition:
+            quota = self._get(key)
+            quota.tokens = min(quota.burst, quota.tokens + 1)
+            quota.used = max(0, quota.used - 1)
+            self.condition.notify_all()
+
+    def record(self, key: str, status_code: int, headers: dict):
+        """Updates a key from an upstream response, draining its bucket if rate limited"""
+        with self.condition:
+            quota = self._get(key)
+
+            remaining = headers.get("X-RateLimit-Remaining")
+            if remaining is not None and remaining.isdigit():
+                quota.reported_remaining = int(remaining)
+
+            if status_code == 429:
+                quota.tokens = 0
+
+    def stats(self) -> dict:
+        with self.condition:
+            for quota in self.keys:
+                quota.refill()
+
+            return {
+                "keys": [quota.stats() for quota in self.keys],
+                "waiting": {priority.name.lower(): count for priority, count in self.waiting.items()},
+                **self.counters,
+            }
+
+    def _take(self, priority: Priority) -> Optional[str]:
+        if any(self.waiting[higher] for higher in Priority if higher < priority):
+            return None
+
+        for quota in self.keys:
+            quota.refill()
+
+        for quota in sorted(self.keys, key=lambda q: q.headroom(), reverse=True):
+            if self._can_take(quota, priority):
+                self._consume(quota)
+                return quota.key
+
+        return None
+
+    def _can_take(self, quota: KeyQuota, priority: Priority) -> bool:
+        reserve = self.reserves[priority]
+        return quota.tokens - 1 >= reserve * quota.burst and quota.remaining() - 1 >= reserve * quota.quota
+
+    def _has_quota(self, priority: Priority) -> bool:
+        reserve = self.reserves[priority]
+        return any(quota.remaining() - 1 >= reserve * quota.quota for quota in self.keys)
+
+    @staticmethod
+    def _consume(quota: KeyQuota):
+        quota.tokens -= 1
+        quota.used += 1
+
+    def _get(self, key: str) -> KeyQuota:
+        return next(quota for quota in self.keys if quota.key == key)
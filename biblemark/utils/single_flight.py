@@ -0,0 +1,116 @@
+import contextlib
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, coalescing stays in-process only
+    fcntl = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls sharing the same key into a single execution.
+
+    The first caller of a key runs the function, and every other caller arriving
+    while it is still in flight waits for, and receives, the same result or error.
+    """
+
+    class Call:
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = SingleFlight.Call()
+                self.calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "inFlight": len(self.calls),
+        }
+
+
+LOCK_STRIPES = 256  # lock files per directory, keys sharing one wait for each other
+
+
+@contextlib.contextmanager
+def file_lock(directory: str, key: str, timeout: float = 10, poll_interval: float = 0.05):
+    """
+    Holds an exclusive lock file for the key, shared by every process using the same directory.
+
+    The lock is released by the OS if the holder dies, so it works as a lease.
+    After the timeout, it gives up waiting and proceeds without the lock.
+    Keys are hashed into a fixed set of lock files, which are kept for reuse.
+
+    :param directory: directory of lock files
+    :param key: locked resource
+    :param timeout: maximum time in seconds waiting for another holder
+    :param poll_interval: time in seconds between lock attempts
+    :yield: True if the lock was acquired, False otherwise
+    """
+    if fcntl is None:
+        yield False
+        return
+
+    os.makedirs(directory, exist_ok=True)
+    stripe = int(hashlib.md5(key.encode("utf-8")).hexdigest(), 16) % LOCK_STRIPES
+    path = os.path.join(directory, f"{stripe:03d}.lock")
+
+    with open(path, "a") as file:
+        deadline = time.monotonic() + timeout
+        acquired = False
+
+        while True:
+            try:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                acquired = True
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(poll_interval)
+
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
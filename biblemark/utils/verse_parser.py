@@ -0,0 +1,178 @@
+import re
+from html import escape
+from html.parser import HTMLParser
+
+VERSE_ID_NUMBER = re.compile(r"\.(\d+)(?:-\d+)?$")
+NEWLINE = re.compile(r"\n")
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+class ChapterVerseParser(HTMLParser):
+    """
+    Splits chapter HTML rendered with verse spans into per-verse fragments.
+
+    Each verse is kept as a list of parts, one for each top-level block (e.g. paragraph)
+    it appears in, so a range of verses can be reassembled with its original paragraphs.
+    Only verse number markers (span.v) and verse spans (span.verse-span) are kept,
+    which means headings and other content between verses are left out.
+    Markers may precede their verse span or be nested in it.
+
+    The plain text of each verse and the offsets of its parts in the chapter HTML are kept as well.
+    """
+
+    def __init__(self, content: str):
+        super().__init__(convert_charrefs=True)
+        self.content = content
+        self.line_offsets = [0] + [match.end() for match in NEWLINE.finditer(content)]
+        self.blocks = []  # [open tag, tag name] of each top-level element
+        self.verses = {}  # verse number -> [[block index, html], ...]
+        self.spans = {}  # verse number -> [[start offset, end offset], ...]
+        self.texts = {}  # verse number -> text pieces
+        self.depth = 0
+        self.verse = None  # verse of the element being captured
+        self.verse_depth = None  # depth of the element being captured
+        self.verse_start = None  # offset of the element being captured
+        self.is_verse_text = False  # whether the element being captured is a verse span, not a number marker
+        self.marker_depth = None  # depth of a number marker nested in the verse span being captured
+        self.pieces = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            self.handle_startendtag(tag, attrs)
+            return
+
+        text = self.get_starttag_text()
+
+        if self.depth == 0:
+            self.blocks.append([text, tag])
+        elif self.verse is not None:
+            self.pieces.append(text)
+
+            if self.is_verse_text and self.marker_depth is None and "v" in (dict(attrs).get("class") or "").split():
+                self.marker_depth = self.depth  # its number is not part of the verse text
+        else:
+            number = parse_verse_number(attrs)
+            if number is not None:
+                self.verse = number
+                self.verse_depth = self.depth
+                self.verse_start = self.get_offset()
+                self.is_verse_text = "verse-span" in (dict(attrs).get("class") or "").split()
+                self.pieces = [text]
+
+                if self.is_verse_text and str(number) in self.texts:
+                    self.texts[str(number)].append(" ")  # verse continued in another element
+
+        self.depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        if self.verse is not None:
+            self.pieces.append(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        self.depth -= 1
+
+        if self.verse is not None:
+            self.pieces.append(f"</{tag}>")
+
+            if self.depth == self.marker_depth:
+                self.marker_depth = None
+
+            if self.depth == self.verse_depth:
+                self.add_piece(self.content.find(">", self.get_offset()) + 1)
+
+    def handle_data(self, data):
+        if self.verse is not None:
+            self.pieces.append(escape(data, quote=False))
+
+            if self.is_verse_text and self.marker_depth is None:
+                self.texts.setdefault(str(self.verse), []).append(data)
+
+    def get_offset(self) -> int:
+        """Offset in the chapter HTML of the current tag"""
+        line, column = self.getpos()
+        return self.line_offsets[line - 1] + column
+
+    def add_piece(self, end: int):
+        parts = self.verses.setdefault(str(self.verse), [])
+        spans = self.spans.setdefault(str(self.verse), [])
+        html = "".join(self.pieces)
+        block_index = len(self.blocks) - 1
+
+        if parts and parts[-1][0] == block_index:
+            parts[-1][1] += html  # verse number followed by its verse span
+            spans[-1][1] = end
+        else:
+            parts.append([block_index, html])
+            spans.append([self.verse_start, end])
+
+        self.verse = None
+        self.verse_depth = None
+        self.verse_start = None
+        self.is_verse_text = False
+        self.marker_depth = None
+        self.pieces = []
+
+
+def parse_verse_number(attrs) -> int:
+    attributes = dict(attrs)
+    classes = (attributes.get("class") or "").split()
+
+    if "v" in classes and attributes.get("data-number", "").isdigit():
+        return int(attributes["data-number"])
+
+    if "verse-span" in classes and attributes.get("data-verse-id"):
+        match = VERSE_ID_NUMBER.search(attributes["data-verse-id"])
+        if match:
+            return int(match.group(1))
+
+    return None
+
+
+def split_chapter_verses(content: str) -> dict:
+    """
+    Splits chapter HTML rendered with verse spans into blocks and verse parts.
+
+    :param content: chapter HTML
+    :return: dict with the "blocks" and "verses" of the chapter, and the "ordered" verses
+    with their number, plain text and [start, end) offsets of their parts in the HTML
+    """
+    parser = ChapterVerseParser(content)
+    parser.feed(content)
+    parser.close()
+
+    ordered = [
+        {
+            "number": int(number),
+            "text": " ".join("".join(parser.texts.get(number, [])).split()),
+            "spans": parser.spans[number],
+        }
+        for number in parser.verses
+    ]
+
+    return {"blocks": parser.blocks, "verses": parser.verses, "ordered": ordered}
+
+
+def join_verses(chapters: [(dict, [str])]) -> str:
+    """
+    Assembles HTML of verses, reopening the original blocks they belong to.
+
+    :param chapters: pairs of split chapter and verse numbers of the chapter to include
+    :return: HTML content
+    """
+    html = []
+    current_block = None
+
+    for chapter_index, (chapter, verse_numbers) in enumerate(chapters):
+        for verse_number in verse_numbers:
+            for block_index, part in chapter["verses"][verse_number]:
+                if current_block != (chapter_index, block_index):
+                    if current_block is not None:
+                        html.append(f"</{chapters[current_block[0]][0]['blocks'][current_block[1]][1]}>")
+                    html.append(chapter["blocks"][block_index][0])
+                    current_block = (chapter_index, block_index)
+                html.append(part)
+
+    if current_block is not None:
+        html.append(f"</{chapters[current_block[0]][0]['blocks'][current_block[1]][1]}>")
+
+    return "".join(html)
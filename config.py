@@ -9,15 +9,85 @@ load_dotenv(os.path.join(basedir, ".env"))
 class Config(object):
     SECRET_KEY = os.environ.get("SECRET_KEY")
     API_BIBLE_APP_KEY = os.environ.get("API_BIBLE_APP_KEY")
+    API_BIBLE_APP_KEYS = [  # spread load
+        key.strip() for key in (os.environ.get("API_BIBLE_APP_KEYS") or API_BIBLE_APP_KEY or "").split(",")
+        if key.strip()
+    ]
     API_BIBLE_BASE_URL = os.environ.get("API_BIBLE_BASE_URL") or "https://api.scripture.api.bible"
+    API_BIBLE_RATE_LIMIT = float(os.environ.get("API_BIBLE_RATE_LIMIT") or 10)  # requests per second of each key
+    API_BIBLE_BURST = int(os.environ.get("API_BIBLE_BURST") or 20)  # requests of each key sent at once
+    API_BIBLE_QUOTA = int(os.environ.get("API_BIBLE_QUOTA") or 5000)  # requests of each key per quota period
+    API_BIBLE_QUOTA_PERIOD = float(os.environ.get("API_BIBLE_QUOTA_PERIOD") or 86400)  # 86400s = 1 day
+    API_BIBLE_RESERVE_ENRICHMENT = float(os.environ.get("API_BIBLE_RESERVE_ENRICHMENT") or 0.2)  # left for readers
+    API_BIBLE_RESERVE_BACKGROUND = float(os.environ.get("API_BIBLE_RESERVE_BACKGROUND") or 0.5)
+    API_BIBLE_MAX_WAIT = float(os.environ.get("API_BIBLE_MAX_WAIT") or 5)  # seconds waiting for a token
 
     DATABASE_FILE = os.environ.get("DATABASE_FILE") or os.path.join(basedir, "biblemark.sqlite")
     DATABASE_SCHEMA_SCRIPT = os.environ.get("DATABASE_SCHEMA_SCRIPT") or os.path.join(basedir, "schema.sql")
     DATABASE_DATA_SCRIPT = os.environ.get("DATABASE_DATA_SCRIPT") or os.path.join(basedir, "data.sql")
+    DATABASE_MIGRATIONS_DIR = os.environ.get("DATABASE_MIGRATIONS_DIR") or os.path.join(basedir, "migrations")
+    DATABASE_MIGRATE_ON_START = (os.environ.get("DATABASE_MIGRATE_ON_START") or "true").lower() == "true"  # or fail
+    DATABASE_POOL_SIZE = int(os.environ.get("DATABASE_POOL_SIZE") or 8)  # idle connections kept per worker and mode
+    DATABASE_READ_CONNECTIONS = (os.environ.get("DATABASE_READ_CONNECTIONS") or "true").lower() == "true"  # GETs
+    DATABASE_JOURNAL_MODE = os.environ.get("DATABASE_JOURNAL_MODE") or "WAL"  # readers don't block the writer
+    DATABASE_SYNCHRONOUS = os.environ.get("DATABASE_SYNCHRONOUS") or "NORMAL"  # safe with WAL, fsync at checkpoints
+    DATABASE_CACHE_SIZE = int(os.environ.get("DATABASE_CACHE_SIZE") or -16000)  # negative in KiB, 16 MB per conn.
+    DATABASE_MMAP_SIZE = int(os.environ.get("DATABASE_MMAP_SIZE") or 256 * 1024 * 1024)  # bytes, 0 disables
+    DATABASE_BUSY_TIMEOUT = int(os.environ.get("DATABASE_BUSY_TIMEOUT") or 5000)  # ms waiting for the write lock
+    DATABASE_FOREIGN_KEYS = (os.environ.get("DATABASE_FOREIGN_KEYS") or "true").lower() == "true"
 
     CACHE_DIR = os.environ.get("CACHE_DIR") or os.path.join(basedir, "cache")
     CACHE_THRESHOLD = os.environ.get("CACHE_THRESHOLD") or 1000
     CACHE_DEFAULT_TIMEOUT = os.environ.get("CACHE_DEFAULT_TIMEOUT") or 3600  # 3600s = 1h
+    CACHE_TIMEOUT_JITTER = float(os.environ.get("CACHE_TIMEOUT_JITTER") or 0.1)  # +/- 10% of the timeout
+    CACHE_STALE_WINDOW = int(os.environ.get("CACHE_STALE_WINDOW") or 86400)  # stale data served up to 1 day
+    CACHE_NEGATIVE_TIMEOUT = int(os.environ.get("CACHE_NEGATIVE_TIMEOUT") or 60)  # upstream 404s cached for 1 min
+    CACHE_L1_MAX_BYTES = int(os.environ.get("CACHE_L1_MAX_BYTES") or 32 * 1024 * 1024)  # in-process tier, 0 disables
+    CACHE_L1_CHECK_INTERVAL = float(os.environ.get("CACHE_L1_CHECK_INTERVAL") or 1)  # seconds between clear checks
+    CACHE_DERIVED_DIR = os.environ.get("CACHE_DERIVED_DIR") or os.path.join(basedir, "cache-derived")  # ETags, etc.
+    CACHE_DERIVED_THRESHOLD = int(os.environ.get("CACHE_DERIVED_THRESHOLD") or 2000)  # not evicting upstream data
+    CACHE_DERIVED_L1_MAX_BYTES = int(os.environ.get("CACHE_DERIVED_L1_MAX_BYTES") or 8 * 1024 * 1024)
+    CACHE_WARM_ON_START = (os.environ.get("CACHE_WARM_ON_START") or "false").lower() == "true"
+    CACHE_LOCK_DIR = os.environ.get("CACHE_LOCK_DIR") or os.path.join(basedir, "cache-locks")
+    CACHE_LOCK_TIMEOUT = float(os.environ.get("CACHE_LOCK_TIMEOUT") or 10)  # seconds waiting for another worker
+
+    STORE_DIR = os.environ.get("STORE_DIR") or os.path.join(basedir, "store")  # packed chapters per version
+    STORE_CHECK_INTERVAL = float(os.environ.get("STORE_CHECK_INTERVAL") or 30)  # seconds between new pack checks
+
+    VERSIONS_CHECK_INTERVAL = float(os.environ.get("VERSIONS_CHECK_INTERVAL") or 5)  # seconds between reload checks
+
+    PREFETCH_ENABLED = (os.environ.get("PREFETCH_ENABLED") or "false").lower() == "true"  # spends background quota
+    PREFETCH_PREVIOUS = (os.environ.get("PREFETCH_PREVIOUS") or "false").lower() == "true"
+    PREFETCH_WORKERS = int(os.environ.get("PREFETCH_WORKERS") or 2)
+    PREFETCH_MAX_PENDING = int(os.environ.get("PREFETCH_MAX_PENDING") or 16)
+    PREFETCH_MAX_UPSTREAM_LATENCY = float(os.environ.get("PREFETCH_MAX_UPSTREAM_LATENCY") or 1.5)  # seconds
+    PREFETCH_RATE_LIMIT_BACKOFF = float(os.environ.get("PREFETCH_RATE_LIMIT_BACKOFF") or 300)  # seconds after a 429
+
+    HTTP_CACHE_MAX_AGE = int(os.environ.get("HTTP_CACHE_MAX_AGE") or 86400)  # Bible content kept by browsers 1 day
+    HTTP_CACHE_VERSIONS_MAX_AGE = int(os.environ.get("HTTP_CACHE_VERSIONS_MAX_AGE") or 3600)  # versions list 1h
+
+    COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE") or 1024)  # bytes, smaller responses left as is
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL") or 6)  # 1 (fastest) to 9 (smallest)
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY") or 5)  # 0 to 11, if installed
+
+    HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT") or 5)  # seconds
+    HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE") or 16)  # kept-alive connections per host
+    HTTP_POOL_BLOCK = (os.environ.get("HTTP_POOL_BLOCK") or "false").lower() == "true"
+    HTTP_KEEPALIVE_IDLE = int(os.environ.get("HTTP_KEEPALIVE_IDLE") or 60)  # seconds before TCP keep-alive probes
+    HTTP_RETRY_TOTAL = int(os.environ.get("HTTP_RETRY_TOTAL") or 2)
+    HTTP_RETRY_BACKOFF = float(os.environ.get("HTTP_RETRY_BACKOFF") or 0.3)  # 0.3s, 0.6s, 1.2s...
+    HTTP_HEDGE_ENABLED = (os.environ.get("HTTP_HEDGE_ENABLED") or "true").lower() == "true"
+    HTTP_HEDGE_DELAY = float(os.environ.get("HTTP_HEDGE_DELAY") or 0)  # seconds, 0 follows the p95 latency
+    HTTP_HEDGE_MIN_DELAY = float(os.environ.get("HTTP_HEDGE_MIN_DELAY") or 0.2)  # seconds
+
+    BREAKER_FAILURE_RATE = float(os.environ.get("BREAKER_FAILURE_RATE") or 0.5)  # failed ratio opening the circuit
+    BREAKER_WINDOW = int(os.environ.get("BREAKER_WINDOW") or 20)  # latest upstream calls considered
+    BREAKER_MIN_CALLS = int(os.environ.get("BREAKER_MIN_CALLS") or 10)
+    BREAKER_COOLDOWN = float(os.environ.get("BREAKER_COOLDOWN") or 30)  # seconds before probing again
+
+    STATS_USERS = [  # usernames allowed to see the runtime counters of /api/stats
+        username.strip() for username in (os.environ.get("STATS_USERS") or "").split(",") if username.strip()
+    ]
 
     DEFAULT_VERSION_ID = os.environ.get("DEFAULT_VERSION_ID") or "KJV"
     DEFAULT_BOOK_ID = os.environ.get("DEFAULT_BOOK_ID") or "JHN"
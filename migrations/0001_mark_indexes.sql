@@ -0,0 +1,10 @@
+/* marks of a user paginated by date, and their count; covering through the rowid */
+CREATE INDEX mark_user_highlight_idx ON mark (user_id, marked) WHERE color IS NOT NULL;
+CREATE INDEX mark_user_note_idx ON mark (user_id, marked) WHERE note IS NOT NULL;
+
+/* marked verses of a mark, joined by every mark query */
+CREATE INDEX marked_verse_mark_idx ON marked_verse (mark_id);
+
+/* visible marked verses of a chapter, and most marked chapters of a version */
+CREATE INDEX marked_verse_visible_chapter_idx ON marked_verse (version_id, book_id, chapter_id, mark_id)
+  WHERE visibility IS TRUE;
@@ -0,0 +1,2 @@
+/* every mark of a user by ID, for exports and cascading user deletions */
+CREATE INDEX mark_user_idx ON mark (user_id);
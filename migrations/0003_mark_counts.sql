@@ -0,0 +1,92 @@
+/* highlights and notes of each user, kept by the triggers below instead of counting marks on every page */
+CREATE TABLE mark_count (
+  user_id INTEGER PRIMARY KEY,
+  highlights INTEGER NOT NULL DEFAULT 0,
+  notes INTEGER NOT NULL DEFAULT 0,
+  FOREIGN KEY(user_id) REFERENCES user(id) ON DELETE CASCADE
+);
+
+/* highlights of each user by color, rows dropped when their count reaches zero */
+CREATE TABLE mark_color_count (
+  user_id INTEGER NOT NULL,
+  color TEXT NOT NULL,
+  highlights INTEGER NOT NULL,
+  PRIMARY KEY(user_id, color),
+  FOREIGN KEY(user_id) REFERENCES user(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+INSERT INTO mark_count (user_id, highlights, notes)
+SELECT user_id, count(color), count(note)
+  FROM mark
+ GROUP BY user_id;
+
+INSERT INTO mark_color_count (user_id, color, highlights)
+SELECT user_id, color, count(*)
+  FROM mark
+ WHERE color IS NOT NULL
+ GROUP BY user_id, color;
+
+/* the counters are updated in the transaction of the mark change, as are cascading deletions */
+CREATE TRIGGER mark_count_insert AFTER INSERT ON mark
+BEGIN
+  INSERT INTO mark_count (user_id, highlights, notes)
+  VALUES (NEW.user_id, NEW.color IS NOT NULL, NEW.note IS NOT NULL)
+      ON CONFLICT (user_id) DO UPDATE
+     SET highlights = highlights + excluded.highlights,
+         notes = notes + excluded.notes;
+
+  INSERT INTO mark_color_count (user_id, color, highlights)
+  SELECT NEW.user_id, NEW.color, 1
+   WHERE NEW.color IS NOT NULL
+      ON CONFLICT (user_id, color) DO UPDATE
+     SET highlights = highlights + 1;
+END;
+
+CREATE TRIGGER mark_count_delete AFTER DELETE ON mark
+BEGIN
+  UPDATE mark_count
+     SET highlights = highlights - (OLD.color IS NOT NULL),
+         notes = notes - (OLD.note IS NOT NULL)
+   WHERE user_id = OLD.user_id;
+
+  UPDATE mark_color_count
+     SET highlights = highlights - 1
+   WHERE user_id = OLD.user_id
+     AND color = OLD.color;
+
+  DELETE FROM mark_color_count
+   WHERE user_id = OLD.user_id
+     AND color = OLD.color
+     AND highlights <= 0;
+END;
+
+/* the counts of the old values are removed, then the ones of the new values are added */
+CREATE TRIGGER mark_count_update AFTER UPDATE OF user_id, color, note ON mark
+BEGIN
+  UPDATE mark_count
+     SET highlights = highlights - (OLD.color IS NOT NULL),
+         notes = notes - (OLD.note IS NOT NULL)
+   WHERE user_id = OLD.user_id;
+
+  UPDATE mark_color_count
+     SET highlights = highlights - 1
+   WHERE user_id = OLD.user_id
+     AND color = OLD.color;
+
+  DELETE FROM mark_color_count
+   WHERE user_id = OLD.user_id
+     AND color = OLD.color
+     AND highlights <= 0;
+
+  INSERT INTO mark_count (user_id, highlights, notes)
+  VALUES (NEW.user_id, NEW.color IS NOT NULL, NEW.note IS NOT NULL)
+      ON CONFLICT (user_id) DO UPDATE
+     SET highlights = highlights + excluded.highlights,
+         notes = notes + excluded.notes;
+
+  INSERT INTO mark_color_count (user_id, color, highlights)
+  SELECT NEW.user_id, NEW.color, 1
+   WHERE NEW.color IS NOT NULL
+      ON CONFLICT (user_id, color) DO UPDATE
+     SET highlights = highlights + 1;
+END;
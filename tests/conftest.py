@@ -0,0 +1,52 @@
+import pytest
+
+from biblemark import create_app
+from biblemark.config.db import init_db
+from config import Config
+
+
+@pytest.fixture
+def config_class(tmp_path):
+    """Configuration of an app with its database and files in a temporary directory"""
+    class TestConfig(Config):
+        TESTING = True
+        SECRET_KEY = "test"
+        API_BIBLE_APP_KEYS = ["test"]
+        DATABASE_FILE = str(tmp_path / "biblemark.sqlite")
+        CACHE_DIR = str(tmp_path / "cache")
+        CACHE_DERIVED_DIR = str(tmp_path / "cache-derived")
+        CACHE_LOCK_DIR = str(tmp_path / "cache-locks")
+        STORE_DIR = str(tmp_path / "store")
+        CACHE_WARM_ON_START = False
+        PREFETCH_ENABLED = False
+
+    return TestConfig
+
+
+@pytest.fixture
+def app(config_class):
+    app = create_app(config_class)
+
+    with app.app_context():
+        init_db()  # schema, versions and every migration
+
+    yield app
+
+
+@pytest.fixture
+def db(app):
+    """Write connection of a request, as used by the repositories"""
+    from biblemark.config.db import get_db
+
+    with app.test_request_context(method="POST"):
+        yield get_db()
+
+
+@pytest.fixture
+def client(app):
+    """Client of a registered and logged in user"""
+    client = app.test_client()
+    client.post("/register", data={"username": "reader", "name": "Reader", "password": "secret",
+                                   "confirmation": "secret"})
+    client.post("/login", data={"username": "reader", "password": "secret"})
+    return client
@@ -0,0 +1,77 @@
+import pytest
+from flask import jsonify
+
+from biblemark.config.cache import get_cache
+from biblemark.config.db import get_db
+from biblemark.config import versions
+from biblemark.config.versions import bump_generation
+from biblemark.middleware.conditional_middleware import conditional
+from biblemark.service.bible_service import get_version
+
+
+@pytest.fixture
+def conditional_app(app):
+    @app.route("/test/conditional/<int:size>")
+    @conditional()
+    def conditional_view(size):
+        return jsonify({"text": "x" * size})
+
+    @app.route("/test/conditional/versions/<version_id>")
+    @conditional()
+    def conditional_version_view(version_id):
+        return jsonify({"version": get_version(version_id).name})
+
+    return app
+
+
+def get(client, url, etag=None, encoding="gzip"):
+    headers = {"Accept-Encoding": encoding}
+    if etag is not None:
+        headers["If-None-Match"] = etag
+    return client.get(url, headers=headers)
+
+
+@pytest.mark.parametrize("size, encoding, weak", [
+    (4096, "gzip", True),  # compressed
+    (4096, "identity", False),  # not accepted compressed
+    (10, "gzip", False),  # too small to compress
+])
+def test_not_modified_carries_the_etag_of_the_full_response(conditional_app, size, encoding, weak):
+    client = conditional_app.test_client()
+    url = f"/test/conditional/{size}"
+
+    full = get(client, url, encoding=encoding)
+    assert full.status_code == 200
+    assert full.headers["ETag"].startswith('W/"') == weak
+
+    not_modified = get(client, url, full.headers["ETag"], encoding)  # answered from the cached ETag
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == full.headers["ETag"]
+
+
+def test_not_modified_by_the_view_carries_the_weak_etag(conditional_app):
+    client = conditional_app.test_client()
+    full = get(client, "/test/conditional/4096")
+
+    with conditional_app.app_context():  # the view answers, as the ETag is no longer cached
+        get_cache().clear()
+    not_modified = get(client, "/test/conditional/4096", full.headers["ETag"])
+
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == full.headers["ETag"]
+
+
+def test_not_modified_is_not_answered_for_a_disabled_version(conditional_app, monkeypatch):
+    monkeypatch.setitem(versions.settings, "VERSIONS_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(versions, "next_check", 0.0)
+    monkeypatch.setattr(versions, "registry", None)  # restored for the next tests, with the version enabled
+    client = conditional_app.test_client()
+    full = get(client, "/test/conditional/versions/KJV")
+    assert full.status_code == 200
+
+    with conditional_app.test_request_context(method="POST"):
+        get_db().execute("UPDATE version SET disabled = 1 WHERE internal_id = 'KJV'")
+        get_db().commit()
+        bump_generation()
+
+    assert get(client, "/test/conditional/versions/KJV", full.headers["ETag"]).status_code == 404
@@ -0,0 +1,59 @@
+import atexit
+import sqlite3
+
+import pytest
+
+from biblemark import create_app
+from biblemark.config.db import close_pools, list_migrations
+
+
+def create_unmigrated_database(config_class):
+    """Database at the schema of the first release, before any migration"""
+    db = sqlite3.connect(config_class.DATABASE_FILE)
+    for script in (config_class.DATABASE_SCHEMA_SCRIPT, config_class.DATABASE_DATA_SCRIPT):
+        with open(script, encoding="utf8") as file:
+            db.executescript(file.read())
+    db.close()
+
+
+def get_schema_version(config_class) -> int:
+    db = sqlite3.connect(config_class.DATABASE_FILE)
+    try:
+        return db.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        db.close()
+
+
+def test_pending_migrations_are_applied_on_start(config_class):
+    create_unmigrated_database(config_class)
+
+    app = create_app(config_class)
+
+    latest = list_migrations(config_class.DATABASE_MIGRATIONS_DIR)[-1][0]
+    assert get_schema_version(config_class) == latest
+
+    client = app.test_client()
+    client.post("/register", data={"username": "reader", "name": "Reader", "password": "secret",
+                                   "confirmation": "secret"})
+    client.post("/login", data={"username": "reader", "password": "secret"})
+    assert client.get("/profile").status_code == 200
+
+
+def test_start_is_refused_when_behind_without_migrating(config_class):
+    create_unmigrated_database(config_class)
+    config_class.DATABASE_MIGRATE_ON_START = False
+
+    with pytest.raises(RuntimeError):
+        create_app(config_class)
+
+    assert get_schema_version(config_class) == 0
+
+
+def test_pools_close_is_registered_once(config_class, monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+
+    create_app(config_class)
+    create_app(config_class)
+
+    assert close_pools not in registered
@@ -0,0 +1,75 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from requests import Response
+
+from biblemark.exceptions.bible_http_exceptions import UpstreamQuotaExceeded
+from biblemark.service import external_bible_api_service
+from biblemark.utils.request_scheduler import Priority, RequestScheduler
+
+URL = "/v1/bibles/test/chapters/JHN.3?include-verse-spans=true"
+
+
+@pytest.fixture
+def upstream(app, monkeypatch):
+    """Upstream answering every URL after the release event is set, counting the requests"""
+    upstream = {"requests": 0, "sent": threading.Event(), "release": threading.Event()}
+
+    def hedged_get(url, **kwargs):
+        upstream["requests"] += 1
+        upstream["sent"].set()
+        upstream["release"].wait(5)
+        response = Response()
+        response.status_code = 200
+        response._content = b'{"data": {"id": "JHN.3"}}'
+        return response
+
+    monkeypatch.setattr(external_bible_api_service, "hedged_get", hedged_get)
+    monkeypatch.setattr(external_bible_api_service, "single_flight", external_bible_api_service.SingleFlight())
+    return upstream
+
+
+def use_scheduler(monkeypatch, background_reserve: float) -> RequestScheduler:
+    scheduler = RequestScheduler(["test"], rate=10, burst=20, quota=100, period=86400, reserves={
+        Priority.INTERACTIVE: 0,
+        Priority.ENRICHMENT: 0,
+        Priority.BACKGROUND: background_reserve,
+    })
+    monkeypatch.setattr(external_bible_api_service, "get_scheduler", lambda: scheduler)
+    return scheduler
+
+
+def request(app, priority: Priority) -> dict:
+    with app.app_context():
+        return external_bible_api_service.request_api_bible(URL, priority)
+
+
+def test_joined_call_gives_back_its_token(app, upstream, monkeypatch):
+    scheduler = use_scheduler(monkeypatch, background_reserve=0)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        background = executor.submit(request, app, Priority.BACKGROUND)
+        assert upstream["sent"].wait(5)
+        interactive = executor.submit(request, app, Priority.INTERACTIVE)
+        while external_bible_api_service.single_flight.stats()["coalesced"] == 0:
+            time.sleep(0.01)
+        upstream["release"].set()
+
+        assert background.result() == interactive.result() == {"data": {"id": "JHN.3"}}
+
+    assert upstream["requests"] == 1
+    assert scheduler.stats()["keys"][0]["used"] == 1
+
+
+def test_quota_rejection_of_a_lower_priority_is_not_shared(app, upstream, monkeypatch):
+    use_scheduler(monkeypatch, background_reserve=1)  # no quota left for the background
+    upstream["release"].set()
+
+    with pytest.raises(UpstreamQuotaExceeded):
+        request(app, Priority.BACKGROUND)
+    assert external_bible_api_service.single_flight.stats()["executions"] == 0
+
+    assert request(app, Priority.INTERACTIVE) == {"data": {"id": "JHN.3"}}
+    assert upstream["requests"] == 1
@@ -0,0 +1,30 @@
+import atexit
+
+import pytest
+
+from biblemark import create_app
+from biblemark.config.http import close_session
+
+
+@pytest.mark.parametrize("key, value", [
+    ("API_BIBLE_APP_KEYS", []),
+    ("API_BIBLE_RATE_LIMIT", 0),
+    ("API_BIBLE_BURST", 0),
+    ("API_BIBLE_QUOTA", 0),
+    ("API_BIBLE_QUOTA_PERIOD", -1),
+])
+def test_start_is_refused_with_invalid_api_settings(config_class, key, value):
+    setattr(config_class, key, value)
+
+    with pytest.raises(RuntimeError, match=key.replace("_APP_KEYS", "")):
+        create_app(config_class)
+
+
+def test_session_close_is_registered_once(config_class, monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+
+    create_app(config_class)
+    create_app(config_class)
+
+    assert close_session not in registered
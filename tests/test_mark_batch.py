@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+LOCATION = {"versionId": "KJV", "bookId": "JHN", "chapterId": "3"}
+
+
+def create_operation(verse_number, location=LOCATION):
+    operation = {
+        "op": "create",
+        "mark": {
+            "color": "#ffff00",
+            "note": None,
+            "markedVerses": [
+                {"verse": {"versionId": "KJV", "bookId": "JHN", "chapterId": "3", "verseNumber": verse_number}},
+            ],
+        },
+    }
+    if location is not None:
+        operation["location"] = location
+    return operation
+
+
+def post_batch(client, operations):
+    return client.post("/api/marks/batch", data=json.dumps({"operations": operations}),
+                       content_type="application/json")
+
+
+def get_chapter_marks(client):
+    return client.get("/api/marks/versions/KJV/books/JHN/chapters/3").json["marks"]
+
+
+def test_create_without_location_fails_alone(client):
+    response = post_batch(client, [create_operation(1), create_operation(2, location=None)])
+
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json["results"]] == [200, 400]
+    assert [mark["markedVerses"][0]["verse"]["verseNumber"] for mark in get_chapter_marks(client)] == [1]
+
+
+def test_failed_operation_is_rolled_back(client):
+    duplicate = create_operation(5)
+    duplicate["mark"]["markedVerses"] *= 2
+
+    response = post_batch(client, [duplicate, create_operation(6)])
+
+    assert [result["status"] for result in response.json["results"]] == [400, 200]
+    assert len(get_chapter_marks(client)) == 1
+
+
+@pytest.mark.parametrize("color", ["ffff00", "#ffff00\n", "red; background-image: url(x)", 16776960])
+def test_create_with_invalid_color_fails(client, color):
+    operation = create_operation(7)
+    operation["mark"]["color"] = color
+
+    response = post_batch(client, [operation])
+
+    assert [result["status"] for result in response.json["results"]] == [400]
+    assert get_chapter_marks(client) == []
@@ -0,0 +1,19 @@
+import json
+
+
+def record(color):
+    return {
+        "color": color,
+        "note": None,
+        "markedVerses": [{"verse": {"versionId": "KJV", "bookId": "JHN", "chapterId": "3", "verseNumber": 1}}],
+    }
+
+
+def test_import_skips_marks_with_invalid_colors(client):
+    lines = [record("#ffff00"), record("ffff00"), record("red; background-image: url(x)")]
+
+    response = client.post("/api/marks/import", data="".join(json.dumps(line) + "\n" for line in lines),
+                           content_type="application/x-ndjson")
+
+    assert response.json["imported"] == 1
+    assert response.json["errors"] == ["Line 2: Invalid color for mark", "Line 3: Invalid color for mark"]
@@ -0,0 +1,51 @@
+from biblemark import create_app
+from biblemark.config.cache import get_cache
+from biblemark.config.db import init_db
+from biblemark.config.versions import bump_generation, get_version_registry
+from biblemark.model.bible_navigation_index import BibleNavigationIndex
+from biblemark.service import navigation_service
+
+
+def test_index_is_rebuilt_after_clearing_the_cache_or_reloading_versions(config_class, monkeypatch):
+    config_class.VERSIONS_CHECK_INTERVAL = 0
+    config_class.CACHE_L1_CHECK_INTERVAL = 0
+
+    app = create_app(config_class)
+    with app.app_context():
+        init_db()
+
+    builds = []
+    monkeypatch.setattr(navigation_service, "indexes", {})
+    monkeypatch.setattr(navigation_service, "build_navigation_index",
+                        lambda version, priority: builds.append(version.get_internal_id()) or object())
+
+    def get_index():
+        with app.test_request_context():
+            return navigation_service.get_navigation_index(get_version_registry().get("KJV"))
+
+    first = get_index()
+    assert get_index() is first
+    assert len(builds) == 1
+
+    with app.app_context():
+        get_cache().clear()
+    assert get_index() is not first
+    assert len(builds) == 2
+
+    with app.app_context():
+        bump_generation()
+    get_index()
+    assert len(builds) == 3
+
+
+def test_chapters_are_listed_for_a_lowercase_book_id(client, monkeypatch):
+    index = BibleNavigationIndex.from_books_with_chapters([
+        {"id": "JHN", "name": "John", "chapters": [{"id": "JHN.1", "number": "1"}, {"id": "JHN.2", "number": "2"}]},
+    ])
+    monkeypatch.setattr(navigation_service, "indexes", {})
+    monkeypatch.setattr(navigation_service, "build_navigation_index", lambda version, priority: index)
+
+    for book_id in ("JHN", "jhn"):
+        response = client.get(f"/api/versions/KJV/books/{book_id}/chapters")
+        assert response.status_code == 200
+        assert response.json["chapters"] == [{"id": "1"}, {"id": "2"}]
@@ -0,0 +1,26 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from biblemark.converter.pagination_converter import parse_page_args, encode_cursor, decode_cursor
+from biblemark.exceptions.mark_http_exceptions import InvalidPageCursor, InvalidPageSize
+
+
+def test_parse_page_args_rejects_unsupported_size():
+    with pytest.raises(InvalidPageSize):
+        parse_page_args(MultiDict({"size": "7"}))
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor({"marked": "2024-01-01 10:00:00.123456", "id": "42"})
+    assert decode_cursor(cursor) == ("2024-01-01 10:00:00.123456", 42)
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(InvalidPageCursor):
+        decode_cursor("zzz")
+
+
+def test_api_highlights_invalid_size_is_bad_request(client):
+    response = client.get("/api/marks/highlights?size=7")
+
+    assert response.status_code == 400
@@ -0,0 +1,52 @@
+import pytest
+
+from biblemark.config.versions import get_version_registry
+from biblemark.model.bible_book import parse_book
+from biblemark.model.bible_verse import BibleVerse
+from biblemark.model.bible_verse_interval import BibleVerseInterval
+from biblemark.service import mark_service, passage_service
+
+
+@pytest.fixture
+def upstream(app, monkeypatch):
+    """Counts chapter and passage requests, answering every chapter with verses 1 to 3"""
+    calls = {"chapters": [], "passages": []}
+    verses = {str(number): [[0, f"<span>{number}</span>"]] for number in range(1, 4)}
+
+    monkeypatch.setattr(passage_service, "load_chapter_verses",
+                        lambda version, chapter_id, priority: calls["chapters"].append(chapter_id)
+                        or {"blocks": [["<p>", "p"]], "verses": verses})
+    monkeypatch.setattr(mark_service, "fetch_passages",
+                        lambda version_id, passage_id, priority: calls["passages"].append(passage_id)
+                        or {"data": {"content": "<p>passage</p>", "reference": passage_id}})
+    return calls
+
+
+def interval(app, left: str, right: str) -> BibleVerseInterval:
+    with app.app_context():
+        version = get_version_registry().get("KJV")
+
+    def verse(verse_id):
+        book_id, chapter_id, verse_number = verse_id.split(".")
+        return BibleVerse(version, parse_book(book_id), chapter_id, int(verse_number))
+
+    return BibleVerseInterval(verse(left), verse(right))
+
+
+@pytest.mark.parametrize("left, right", [
+    ("GEN.1.1", "REV.22.21"),  # across books
+    ("PSA.1.1", "PSA.150.6"),  # too many chapters
+])
+def test_long_intervals_are_fetched_as_a_single_passage(app, upstream, left, right):
+    passage = mark_service.get_passage(interval(app, left, right))
+
+    assert upstream["chapters"] == []
+    assert upstream["passages"] == [f"{left}-{right}"]
+    assert passage["content"] == "<p>passage</p>"
+
+
+def test_short_intervals_are_assembled_from_chapters(app, upstream):
+    mark_service.get_passage(interval(app, "JHN.3.2", "JHN.5.3"))
+
+    assert upstream["chapters"] == ["JHN.3", "JHN.4", "JHN.5"]
+    assert upstream["passages"] == []
@@ -0,0 +1,19 @@
+from biblemark.config.cache import get_derived_cache
+from biblemark.config.versions import get_version_registry
+from biblemark.service import bible_service, prefetch_service
+from biblemark.utils.request_scheduler import Priority
+
+
+def test_prefetched_chapters_have_their_verses_cached(app, monkeypatch):
+    fetches = []
+    monkeypatch.setattr(bible_service, "fetch_chapter",
+                        lambda version_id, chapter_id, priority: fetches.append((chapter_id, priority))
+                        or {"data": {"content": '<p><span class="verse-span" data-verse-id="JHN.4.1">Text</span></p>'}})
+
+    with app.app_context():
+        version = get_version_registry().get("KJV")
+        prefetch_service.prefetch_chapter(version, "JHN.4")
+
+        assert fetches == [("JHN.4", Priority.BACKGROUND)]
+        assert get_derived_cache().has(bible_service.get_chapter_verses_key(version, "JHN.4"))
+    assert prefetch_service.get_prefetch_stats()["failed"] == 0
@@ -0,0 +1,103 @@
+import re
+
+import pytest
+
+from biblemark.model.bible_book import parse_book
+from biblemark.model.bible_version import Version
+from biblemark.model.marked_verse import MarkedVerse
+from biblemark.model.user import User
+from biblemark.repository import mark_repository
+
+FULL_SCAN = re.compile(r"SCAN (\w+)")  # a table read without any index
+SCANNED_TABLES = ("mark", "marked_verse")
+TABLE_ALIAS = re.compile(r"\b(mark|marked_verse)\s+(?:AS\s+)?(\w+)", re.IGNORECASE)
+EXPLAINED_STATEMENT = re.compile(r"\s*(WITH|SELECT|UPDATE|DELETE)\b", re.IGNORECASE)
+
+USER = User(entity_id=1, name="Probe", username="probe", password=None)
+VERSION = Version("KJV", "de4e12af7f28f599-02", "eng", "King James Version", False)
+MARKED_VERSE = MarkedVerse.factory(VERSION, parse_book("JHN"), "3", 16)
+
+
+def full_scans(db, call) -> [str]:
+    """Runs a repository call, returning the plan lines of its statements scanning mark or marked_verse"""
+    statements = []
+    db.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        db.set_trace_callback(None)
+
+    scans = []
+    for statement in filter(EXPLAINED_STATEMENT.match, statements):
+        # plans name tables by their alias
+        names = set(SCANNED_TABLES) | {alias for _, alias in TABLE_ALIAS.findall(statement)}
+        for row in db.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall():
+            match = FULL_SCAN.fullmatch(row[3])
+            if match and match.group(1) in names:
+                scans.append(f"{row[3]} in {statement}")
+
+    return scans
+
+
+@pytest.fixture
+def no_full_scan(db):
+    def check(call):
+        assert full_scans(db, call) == []
+
+    return check
+
+
+def test_count_highlights_by_user(no_full_scan):
+    no_full_scan(lambda: mark_repository.count_highlights_by_user(USER))
+
+
+def test_count_notes_by_user(no_full_scan):
+    no_full_scan(lambda: mark_repository.count_notes_by_user(USER))
+
+
+def test_count_highlights_by_user_and_color(no_full_scan):
+    no_full_scan(lambda: mark_repository.count_highlights_by_user_and_color(USER))
+
+
+def test_fetch_mark_by_id(no_full_scan):
+    no_full_scan(lambda: mark_repository.fetch_mark_by_id("1"))
+
+
+def test_fetch_marks_by_user_after_id(no_full_scan):
+    no_full_scan(lambda: mark_repository.fetch_marks_by_user_after_id(USER, 0, 500))
+
+
+def test_fetch_most_marked_chapters(no_full_scan):
+    no_full_scan(lambda: mark_repository.fetch_most_marked_chapters("KJV", 10))
+
+
+def test_fetch_paginated_highlights_by_user(no_full_scan):
+    no_full_scan(lambda: mark_repository.fetch_paginated_highlights_by_user(USER, 10, 0))
+
+
+def test_fetch_paginated_notes_by_user(no_full_scan):
+    no_full_scan(lambda: mark_repository.fetch_paginated_notes_by_user(USER, 10, 0))
+
+
+def test_fetch_highlights_page_by_user(no_full_scan):
+    no_full_scan(lambda: mark_repository.fetch_highlights_page_by_user(USER, 10, after=("2024-01-01 00:00:00", 1)))
+
+
+def test_fetch_notes_page_by_user(no_full_scan):
+    no_full_scan(lambda: mark_repository.fetch_notes_page_by_user(USER, 10, before=("2024-01-01 00:00:00", 1)))
+
+
+def test_fetch_visible_marks_by_user_and_chapter(no_full_scan):
+    no_full_scan(lambda: mark_repository.fetch_visible_marks_by_user_and_chapter(USER, "KJV", "JHN", "3"))
+
+
+def test_soft_delete_all_highlights_at_verses(no_full_scan):
+    no_full_scan(lambda: mark_repository.soft_delete_all_highlights_at_verses(USER, [MARKED_VERSE] * 3))
+
+
+def test_soft_delete_marked_verses_by_ids(no_full_scan):
+    no_full_scan(lambda: mark_repository.soft_delete_marked_verses_by_ids(USER, [1, 2, 3]))
+
+
+def test_full_scans_are_detected(db):
+    assert full_scans(db, lambda: db.execute("SELECT * FROM mark m WHERE m.marked > ?", ("2024-01-01",)))
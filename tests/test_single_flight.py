@@ -0,0 +1,18 @@
+import os
+
+from biblemark.utils.single_flight import LOCK_STRIPES, file_lock
+
+
+def test_lock_files_are_bounded_by_the_stripes(tmp_path):
+    for number in range(LOCK_STRIPES * 4):
+        with file_lock(str(tmp_path), f"/v1/bibles/test/passages/JHN.3.{number}") as acquired:
+            assert acquired
+
+    assert len(os.listdir(tmp_path)) <= LOCK_STRIPES
+
+
+def test_same_key_uses_the_same_lock(tmp_path):
+    with file_lock(str(tmp_path), "/v1/bibles/test/chapters/JHN.3") as acquired:
+        assert acquired
+        with file_lock(str(tmp_path), "/v1/bibles/test/chapters/JHN.3", timeout=0.1) as reacquired:
+            assert not reacquired
@@ -0,0 +1,11 @@
+def test_stats_are_forbidden_to_other_users(client):
+    assert client.get("/api/stats").status_code == 403
+
+
+def test_stats_are_available_to_the_configured_users(app, client):
+    app.config["STATS_USERS"] = ["reader"]
+
+    response = client.get("/api/stats")
+
+    assert response.status_code == 200
+    assert {"cache", "quota", "database"} <= response.json.keys()
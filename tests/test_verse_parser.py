@@ -0,0 +1,48 @@
+import pytest
+
+from biblemark.config.cache import get_cache, get_derived_cache
+from biblemark.config.versions import get_version_registry
+from biblemark.service import bible_service
+from biblemark.utils.verse_parser import split_chapter_verses
+
+MARKER_BEFORE = (
+    '<p class="p"><span data-number="16" class="v">16</span>'
+    '<span class="verse-span" data-verse-id="JHN.3.16">For God so loved</span> '
+    '<span data-number="17" class="v">17</span>'
+    '<span class="verse-span" data-verse-id="JHN.3.17">For God sent</span></p>'
+)
+MARKER_NESTED = (
+    '<p class="p"><span class="verse-span" data-verse-id="JHN.3.16">'
+    '<span data-number="16" class="v">16</span>For God so loved</span> '
+    '<span class="verse-span" data-verse-id="JHN.3.17">'
+    '<span data-number="17" class="v">17</span>For God sent</span></p>'
+)
+
+
+@pytest.mark.parametrize("content", [MARKER_BEFORE, MARKER_NESTED], ids=["marker-before", "marker-nested"])
+def test_verse_text_leaves_out_the_number_marker(content):
+    verses = split_chapter_verses(content)
+
+    assert [(verse["number"], verse["text"]) for verse in verses["ordered"]] == [
+        (16, "For God so loved"), (17, "For God sent"),
+    ]
+    for verse in verses["ordered"]:
+        assert f'class="v">{verse["number"]}</span>' in "".join(content[start:end] for start, end in verse["spans"])
+
+
+def test_verses_are_cached_as_the_chapter_is_loaded(app, monkeypatch):
+    fetches = []
+    monkeypatch.setattr(bible_service, "fetch_chapter_store", lambda version_id: None)
+    monkeypatch.setattr(bible_service, "fetch_chapter",
+                        lambda version_id, chapter_id, priority: fetches.append(chapter_id)
+                        or {"data": {"content": MARKER_NESTED}})
+
+    with app.test_request_context():
+        version = get_version_registry().get("KJV")
+        bible_service.load_chapter(version, "JHN.3")
+        verses = bible_service.load_chapter_verses(version, "JHN.3")
+        key = bible_service.get_chapter_verses_key(version, "JHN.3")
+        assert get_derived_cache().has(key) and not get_cache().has(key)  # not evicting upstream data
+
+    assert fetches == ["JHN.3"]
+    assert verses["ordered"][0]["text"] == "For God so loved"
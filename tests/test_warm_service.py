@@ -0,0 +1,7 @@
+from biblemark import create_app
+
+
+def test_warm_on_start_does_not_block_an_uninitialized_database(config_class):
+    config_class.CACHE_WARM_ON_START = True
+
+    assert create_app(config_class) is not None